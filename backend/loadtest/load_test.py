@@ -0,0 +1,112 @@
+"""
+Measures /llm/run throughput and latency percentiles at increasing concurrency levels.
+Meant to run against a backend whose OPENAI_BASE_URL points at mock_llm_server.py.
+
+Example:
+  python load_test.py --url http://localhost:8000 --concurrency 1,4,16,64 --requests 200 \
+      --template generate_questions --arguments '{"input_text": "..."}' --json results.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def run_level(client: httpx.AsyncClient, url: str, payload: Dict[str, Any], concurrency: int,
+                    requests: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    attempts: List[int] = []
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def worker():
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            attempts.append(response.json().get("attempts_made", 0))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "avg_attempts": sum(attempts) / len(attempts) if attempts else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+async def main(args: argparse.Namespace) -> int:
+    payload = {
+        "template_name": args.template,
+        "arguments": json.loads(args.arguments),
+        "candidates": args.candidates,
+        # Cached answers would measure the cache, not the workflow
+        "use_cache": False,
+    }
+    url = args.url.rstrip("/") + "/llm/run"
+    levels = [int(level) for level in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            await run_level(client, url, payload, min(levels), args.warmup)
+        for level in levels:
+            result = await run_level(client, url, payload, level, args.requests)
+            results.append(result)
+            print(f"concurrency={level:<4} ok={result['ok']:<5} errors={sum(result['errors'].values()):<4} "
+                  f"rps={result['throughput_rps']:8.2f} p50={result['p50']:7.3f}s p95={result['p95']:7.3f}s "
+                  f"p99={result['p99']:7.3f}s attempts={result['avg_attempts']:.2f}")
+
+    if args.json:
+        with open(args.json, "wt") as f:
+            json.dump({"url": url, "payload": payload, "results": results}, f, indent=2)
+
+    # Non-zero exit for CI when the error budget is exceeded
+    failed = sum(r["requests"] - r["ok"] for r in results)
+    total = sum(r["requests"] for r in results)
+    return 1 if total and failed / total > args.max_error_rate else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="backend base URL (without /llm/run)")
+    parser.add_argument("--template", default="generate_questions")
+    parser.add_argument("--arguments", default='{"input_text": "Load test input."}', help="template arguments as JSON")
+    parser.add_argument("--candidates", type=int, default=1)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=0, help="requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="write the results to this file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,180 @@
+"""
+Local stand-in for the OpenAI chat-completions API, used to exercise AgentWorkflowEngine
+without network access or token spend. Point the backend at it with
+OPENAI_BASE_URL=http://<host>:<port>/v1 and keep OPENAI_MODEL_NAME a known model name
+(AutoGen looks up the model capabilities by name).
+
+Behaviour is configured with environment variables:
+  MOCK_LLM_LATENCY_MS          time to first token (default 200)
+  MOCK_LLM_LATENCY_JITTER_MS   uniform jitter added to the latency (default 0)
+  MOCK_LLM_TOKENS_PER_SECOND   generation speed, 0 returns instantly (default 0)
+  MOCK_LLM_COMPLETION_TOKENS   length of generated Processor outputs in tokens (default 200)
+  MOCK_LLM_ERROR_RATE          share of requests failing with 500 (default 0)
+  MOCK_LLM_RATE_LIMIT_RATE     share of requests failing with 429 (default 0)
+  MOCK_LLM_VERDICTS            scripted Verifier verdicts per attempt, e.g. "false,false,true";
+                               the last one repeats for further attempts (default "true")
+  MOCK_LLM_REPEAT_FEEDBACK     reject every attempt with the same feedback (default false)
+  MOCK_LLM_PROCESSOR_RESPONSE  file whose content is returned as Processor output instead of filler text
+  MOCK_LLM_SEED                seed of the latency jitter and error injection
+
+Run: python -m uvicorn mock_llm_server:app --port 8100
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "200"))
+LATENCY_JITTER_MS = float(os.getenv("MOCK_LLM_LATENCY_JITTER_MS", "0"))
+TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "0"))
+COMPLETION_TOKENS = int(os.getenv("MOCK_LLM_COMPLETION_TOKENS", "200"))
+ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+RATE_LIMIT_RATE = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0"))
+VERDICTS = [v.strip().lower() == "true" for v in os.getenv("MOCK_LLM_VERDICTS", "true").split(",") if v.strip()] or [True]
+REPEAT_FEEDBACK = os.getenv("MOCK_LLM_REPEAT_FEEDBACK", "false").lower() == "true"
+PROCESSOR_RESPONSE_PATH = os.getenv("MOCK_LLM_PROCESSOR_RESPONSE")
+
+# Streamed responses are sent in chunks of this many tokens
+STREAM_CHUNK_TOKENS = 8
+
+FILLER_WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit")
+
+rng = random.Random(os.getenv("MOCK_LLM_SEED"))
+stats: Dict[str, int] = {"requests": 0, "processor": 0, "verifier": 0, "grader": 0, "errors": 0, "rate_limited": 0}
+
+app = FastAPI(title="Mock LLM")
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+def _count_tokens(text: str) -> int:
+    # Roughly 4 characters per token, good enough for usage accounting
+    return max(1, len(text) // 4)
+
+def _filler(tokens: int) -> str:
+    return " ".join(FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(tokens))
+
+def _processor_output() -> str:
+    if PROCESSOR_RESPONSE_PATH:
+        with open(PROCESSOR_RESPONSE_PATH, "rt", encoding="utf-8") as f:
+            return f.read()
+    return _filler(COMPLETION_TOKENS)
+
+def _verifier_output(attempt: int) -> str:
+    verified = VERDICTS[min(attempt, len(VERDICTS) - 1)]
+    if verified:
+        return 'The output satisfies all criteria.\n{"verified": true, "feedback": ""}'
+    feedback = "The output is incomplete, add the missing details." if REPEAT_FEEDBACK else \
+        f"Attempt {attempt + 1} has problem {uuid.uuid4().hex[:8]}, revise section {attempt + 1}."
+    return f"Needs work.\n{json.dumps({'verified': False, 'feedback': feedback})}"
+
+def _grader_output() -> str:
+    return json.dumps({
+        "question": "...", "user_answer": "...", "verdict": "partially_correct", "score": 0.5,
+        "pass": True, "needs_retry": False, "feedback": "Mostly right, one essential part is missing.",
+    })
+
+def _respond(messages: List[Dict[str, Any]]) -> str:
+    system = " ".join(_text(m.get("content")) for m in messages if m.get("role") == "system")
+    user_turns = sum(1 for m in messages if m.get("role") == "user")
+    if '"verified"' in system:
+        stats["verifier"] += 1
+        # The Verifier agent keeps its history, every earlier user turn is an earlier attempt
+        return _verifier_output(user_turns - 1)
+    if "CORRECT_ANSWER" in " ".join(_text(m.get("content")) for m in messages):
+        stats["grader"] += 1
+        return _grader_output()
+    stats["processor"] += 1
+    return _processor_output()
+
+def _completion(model: str, content: str, prompt_tokens: int) -> Dict[str, Any]:
+    completion_tokens = _count_tokens(content)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+def _chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Any = None,
+           usage: Any = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+    }
+    if usage is not None:
+        payload["usage"] = usage
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def _stream(model: str, content: str, prompt_tokens: int, include_usage: bool):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    words = content.split(" ")
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    for i in range(0, len(words), STREAM_CHUNK_TOKENS):
+        piece = " ".join(words[i:i + STREAM_CHUNK_TOKENS])
+        if i:
+            piece = " " + piece
+        if TOKENS_PER_SECOND > 0:
+            await asyncio.sleep(STREAM_CHUNK_TOKENS / TOKENS_PER_SECOND)
+        yield _chunk(completion_id, model, {"content": piece})
+    yield _chunk(completion_id, model, {}, finish_reason="stop")
+    if include_usage:
+        completion_tokens = _count_tokens(content)
+        yield _chunk(completion_id, model, {}, usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                                      "total_tokens": prompt_tokens + completion_tokens})
+    yield "data: [DONE]\n\n"
+
+def _error(status_code: int, message: str, error_type: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"message": message, "type": error_type}})
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    model = body.get("model", "mock")
+    messages = body.get("messages", [])
+
+    latency = (LATENCY_MS + rng.uniform(0, LATENCY_JITTER_MS)) / 1000
+    await asyncio.sleep(latency)
+
+    roll = rng.random()
+    if roll < RATE_LIMIT_RATE:
+        stats["rate_limited"] += 1
+        return _error(429, "Rate limit reached (injected by mock server)", "rate_limit_exceeded")
+    if roll < RATE_LIMIT_RATE + ERROR_RATE:
+        stats["errors"] += 1
+        return _error(500, "Internal error (injected by mock server)", "server_error")
+
+    content = _respond(messages)
+    prompt_tokens = sum(_count_tokens(_text(m.get("content"))) for m in messages)
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(_stream(model, content, prompt_tokens, include_usage), media_type="text/event-stream")
+
+    if TOKENS_PER_SECOND > 0:
+        await asyncio.sleep(_count_tokens(content) / TOKENS_PER_SECOND)
+    return _completion(model, content, prompt_tokens)
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+@app.get("/stats")
+async def get_stats():
+    return stats
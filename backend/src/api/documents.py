@@ -1,8 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, UploadFile, File, Form, FastAPI
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, status, UploadFile, File, Form, FastAPI, Header
 from core.documents import DocumentManager, get_document_manager
 from schemas.documents import DocumentRead, DocumentList
-from fastapi.responses import Response
+from schemas.pagination import CursorPage
+from util.pagination import MAX_PAGE_SIZE
+from fastapi.responses import StreamingResponse
+from util.http import parse_byte_range
 
 def get_documents_router() -> APIRouter:
     router = APIRouter()
@@ -16,26 +19,59 @@ def get_documents_router() -> APIRouter:
             status.HTTP_404_NOT_FOUND: {
                 "description": "Document not found",
             },
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: {
+                "description": "Requested byte range is outside of the document",
+            },
         },
     )
     async def get_document(
         document_id: int,
+        range: Optional[str] = Header(None),
         manager: DocumentManager = Depends(get_document_manager)
     ):
         db_doc = await manager.get_document(document_id)
-        return Response(content=db_doc.data, media_type=db_doc.content_type)
+        await manager.release_connection()
+        headers = {"Accept-Ranges": "bytes"}
+        byte_range = parse_byte_range(range, db_doc.size)
+        if byte_range is None:
+            headers["Content-Length"] = str(db_doc.size)
+            return StreamingResponse(manager.blob_store.stream(db_doc.blob_key),
+                                     media_type=db_doc.content_type, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{db_doc.size}"
+        return StreamingResponse(manager.blob_store.stream(db_doc.blob_key, start, end),
+                                 status_code=status.HTTP_206_PARTIAL_CONTENT,
+                                 media_type=db_doc.content_type, headers=headers)
+
+    @router.get(
+        "/{document_id}/details",
+        response_model=DocumentRead,
+        name="documents:get_document_details",
+        responses={
+            status.HTTP_404_NOT_FOUND: {
+                "description": "Document not found",
+            },
+        },
+    )
+    async def get_document_details(
+        document_id: int,
+        manager: DocumentManager = Depends(get_document_manager)
+    ):
+        return await manager.get_document_details(document_id)
 
     @router.get(
         "/",
-        response_model=List[DocumentList],
+        response_model=CursorPage[DocumentList],
         name="documents:list_documents",
     )
     async def list_documents(
-        limit: int = 100,
-        offset: int = 0,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
         manager: DocumentManager = Depends(get_document_manager)
     ):
-        return await manager.list_documents(limit, offset)
+        return await manager.list_documents(limit, cursor)
 
     @router.post(
         "/",
@@ -1,9 +1,13 @@
 from typing import Dict, Any
+from uuid import UUID
 
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from core.llm import AgentWorkflowEngine, get_agent_workflow_engine
-from schemas.llm import LLMRequest
+from core.llm_jobs import LLMJobManager, get_llm_job_manager
+from schemas.llm import LLMRequest, LLMJobCreate, LLMJobRead, LLMJobResult
+from util.http import format_sse
 
 def get_llm_router() -> APIRouter:
     """Generate a router for LLM workflow operations."""
@@ -15,6 +19,9 @@ def get_llm_router() -> APIRouter:
         name="llm:run_flow",
         status_code=status.HTTP_200_OK,
         responses={
+            status.HTTP_400_BAD_REQUEST: {
+                "description": "Unknown template or missing template arguments.",
+            },
             status.HTTP_500_INTERNAL_SERVER_ERROR: {
                 "description": "Internal server error during workflow execution.",
             },
@@ -28,13 +35,139 @@ def get_llm_router() -> APIRouter:
         Execute the LLM agent workflow.
         """
         try:
-            return await engine.run_flow(request.template_name, request.arguments)
+            return await engine.run_flow(request.template_name, request.arguments, request.candidates, request.use_cache,
+                                         max_retries=request.max_retries, deadline_seconds=request.deadline_seconds)
+        except HTTPException:
+            # Template validation errors (400) are raised before any LLM call
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error executing workflow: {str(e)}"
             )
 
+    @router.post(
+        "/run/stream",
+        name="llm:run_flow_stream",
+        status_code=status.HTTP_200_OK,
+        response_class=StreamingResponse,
+        responses={
+            status.HTTP_200_OK: {
+                "content": {"text/event-stream": {}},
+                "description": "Server-Sent Events: attempt, token, verdict, result (or error).",
+            },
+            status.HTTP_400_BAD_REQUEST: {
+                "description": "Unknown template or missing template arguments.",
+            },
+        },
+    )
+    async def run_flow_stream(
+        request: LLMRequest,
+        engine: AgentWorkflowEngine = Depends(get_agent_workflow_engine),
+    ):
+        """
+        Execute the LLM agent workflow, streaming progress as Server-Sent Events.
+        """
+        # Validate before the 200 status line is sent
+        engine.check_arguments(request.template_name, request.arguments)
+
+        async def event_stream():
+            try:
+                async for event, data in engine.run_flow_stream(request.template_name, request.arguments, request.use_cache,
+                                                                request.max_retries, request.deadline_seconds):
+                    yield format_sse(event, data)
+            except Exception as e:
+                yield format_sse("error", {"detail": f"Error executing workflow: {str(e)}"})
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @router.post(
+        "/jobs",
+        response_model=LLMJobRead,
+        name="llm:submit_job",
+        status_code=status.HTTP_202_ACCEPTED,
+        responses={
+            status.HTTP_400_BAD_REQUEST: {
+                "description": "Unknown template or missing template arguments.",
+            },
+            status.HTTP_429_TOO_MANY_REQUESTS: {
+                "description": "The job queue is full.",
+            },
+        },
+    )
+    async def submit_job(
+        request: LLMJobCreate,
+        manager: LLMJobManager = Depends(get_llm_job_manager),
+    ):
+        """
+        Queue the LLM agent workflow for background execution.
+        """
+        return await manager.submit_job(request)
+
+    @router.get(
+        "/jobs/{job_id}",
+        response_model=LLMJobRead,
+        name="llm:get_job",
+        responses={
+            status.HTTP_404_NOT_FOUND: {
+                "description": "Job not found.",
+            },
+        },
+    )
+    async def get_job(
+        job_id: UUID,
+        manager: LLMJobManager = Depends(get_llm_job_manager),
+    ):
+        """
+        Get the status of a queued workflow job.
+        """
+        return await manager.get_job(job_id)
+
+    @router.get(
+        "/jobs/{job_id}/result",
+        response_model=LLMJobResult,
+        name="llm:get_job_result",
+        responses={
+            status.HTTP_404_NOT_FOUND: {
+                "description": "Job not found.",
+            },
+            status.HTTP_409_CONFLICT: {
+                "description": "The job has not finished yet.",
+            },
+        },
+    )
+    async def get_job_result(
+        job_id: UUID,
+        manager: LLMJobManager = Depends(get_llm_job_manager),
+    ):
+        """
+        Get the workflow result of a finished job.
+        """
+        return await manager.get_job_result(job_id)
+
+    @router.post(
+        "/jobs/{job_id}/cancel",
+        response_model=LLMJobRead,
+        name="llm:cancel_job",
+        responses={
+            status.HTTP_404_NOT_FOUND: {
+                "description": "Job not found.",
+            },
+            status.HTTP_409_CONFLICT: {
+                "description": "The job has already finished.",
+            },
+        },
+    )
+    async def cancel_job(
+        job_id: UUID,
+        manager: LLMJobManager = Depends(get_llm_job_manager),
+    ):
+        """
+        Cancel a job. A queued job is cancelled immediately, a running one at its next heartbeat.
+        """
+        return await manager.cancel_job(job_id)
+
     return router
 
 def include_routers(app: FastAPI):
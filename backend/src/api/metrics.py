@@ -0,0 +1,34 @@
+from typing import Dict, Any
+
+from fastapi import FastAPI, APIRouter
+
+from core.llm_usage import llm_usage
+from util.metrics import metrics
+
+def get_metrics_router() -> APIRouter:
+    """Generate a router exposing the in-process metrics of this replica."""
+    router = APIRouter()
+
+    @router.get(
+        "/",
+        response_model=Dict[str, Any],
+        name="metrics:snapshot",
+    )
+    async def get_metrics():
+        return metrics.snapshot()
+
+    @router.get(
+        "/llm",
+        response_model=Dict[str, Any],
+        name="metrics:llm_usage",
+    )
+    async def get_llm_usage():
+        """
+        Rolling per-template summary of LLM calls: tokens, estimated cost, latency, retries and verifier pass rate.
+        """
+        return llm_usage.summary()
+
+    return router
+
+def include_routers(app: FastAPI):
+    app.include_router(get_metrics_router(), prefix="/metrics", tags=["metrics"])
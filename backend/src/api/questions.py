@@ -1,7 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, FastAPI
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, status, FastAPI
 from core.questions import QuestionManager, get_question_manager
-from schemas.questions import QuestionRead, QuestionCreate
+from core.question_generation import QuestionGenerationManager, get_question_generation_manager
+from core.grading import GradingManager, get_grading_manager
+from schemas.questions import (QuestionRead, QuestionCreate, QuestionGenerateRequest, QuestionGenerateResult,
+                               GradeRequest, GradeBatchResult)
+from schemas.pagination import CursorPage
+from util.pagination import MAX_PAGE_SIZE
 
 def get_questions_router() -> APIRouter:
     router = APIRouter()
@@ -24,15 +29,15 @@ def get_questions_router() -> APIRouter:
 
     @router.get(
         "/",
-        response_model=List[QuestionRead],
+        response_model=CursorPage[QuestionRead],
         name="questions:list_questions",
     )
     async def list_questions(
-        limit: int = 100,
-        offset: int = 0,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
         manager: QuestionManager = Depends(get_question_manager)
     ):
-        return await manager.list_questions(limit, offset)
+        return await manager.list_questions(limit, cursor)
 
     @router.post(
         "/",
@@ -46,6 +51,39 @@ def get_questions_router() -> APIRouter:
     ):
         return await manager.create_question(question)
 
+    @router.post(
+        "/generate",
+        response_model=QuestionGenerateResult,
+        name="questions:generate_questions",
+        responses={
+            status.HTTP_404_NOT_FOUND: {
+                "description": "Document not found",
+            },
+            status.HTTP_409_CONFLICT: {
+                "description": "Document text is not extracted yet",
+            },
+        },
+    )
+    async def generate_questions(
+        request: QuestionGenerateRequest,
+        manager: QuestionGenerationManager = Depends(get_question_generation_manager)
+    ):
+        return await manager.generate_questions(request.document_id, request.save)
+
+    @router.post(
+        "/grade",
+        response_model=GradeBatchResult,
+        name="questions:grade_answers",
+    )
+    async def grade_answers(
+        request: GradeRequest,
+        manager: GradingManager = Depends(get_grading_manager)
+    ):
+        """
+        Grade a batch of answers concurrently, results are returned per item in request order.
+        """
+        return await manager.grade_answers(request.items)
+
     @router.delete(
         "/{question_id}",
         status_code=status.HTTP_204_NO_CONTENT,
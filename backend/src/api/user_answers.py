@@ -1,7 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, FastAPI
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, status, FastAPI
 from core.user_answers import UserAnswerManager, get_user_answer_manager
-from schemas.user_answers import UserAnswerRead, UserAnswerCreate
+from core.answer_submission import AnswerSubmissionManager, get_answer_submission_manager
+from schemas.user_answers import UserAnswerRead, UserAnswerCreate, AnswerSubmission, AnswerSubmissionResult
+from schemas.pagination import CursorPage
+from util.pagination import MAX_PAGE_SIZE
 
 def get_user_answers_router() -> APIRouter:
     router = APIRouter()
@@ -24,15 +29,34 @@ def get_user_answers_router() -> APIRouter:
 
     @router.get(
         "/",
-        response_model=List[UserAnswerRead],
+        response_model=CursorPage[UserAnswerRead],
         name="user_answers:list_user_answers",
     )
     async def list_user_answers(
-        limit: int = 100,
-        offset: int = 0,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
         manager: UserAnswerManager = Depends(get_user_answer_manager)
     ):
-        return await manager.list_user_answers(limit, offset)
+        return await manager.list_user_answers(limit, cursor)
+
+    @router.get(
+        "/learners/{learner_key}",
+        response_model=CursorPage[UserAnswerRead],
+        name="user_answers:list_learner_answers",
+    )
+    async def list_learner_answers(
+        learner_key: UUID,
+        question_id: Optional[int] = None,
+        answered_from: Optional[datetime] = None,
+        answered_to: Optional[datetime] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        manager: UserAnswerManager = Depends(get_user_answer_manager)
+    ):
+        """
+        List the answers of one learner, newest first, optionally of one question and within [answered_from, answered_to).
+        """
+        return await manager.list_learner_answers(learner_key, question_id, answered_from, answered_to, limit, cursor)
 
     @router.post(
         "/",
@@ -46,6 +70,20 @@ def get_user_answers_router() -> APIRouter:
     ):
         return await manager.create_user_answer(user_answer_create)
 
+    @router.post(
+        "/submit",
+        response_model=AnswerSubmissionResult,
+        name="user_answers:submit_answers",
+    )
+    async def submit_answers(
+        submission: AnswerSubmission,
+        manager: AnswerSubmissionManager = Depends(get_answer_submission_manager)
+    ):
+        """
+        Store, grade and apply to the learner's progress one answer or a whole quiz in a single request.
+        """
+        return await manager.submit_answers(submission)
+
     @router.delete(
         "/{user_answer_id}",
         status_code=status.HTTP_204_NO_CONTENT,
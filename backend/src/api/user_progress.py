@@ -1,7 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, FastAPI
+from typing import List, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, status, FastAPI
 from core.user_progress import UserProgressManager, get_user_progress_manager
-from schemas.user_progress import UserProgressRead, UserProgressCreate
+from schemas.user_progress import (UserProgressRead, UserProgressCreate, AnswerResultBatch, LearnerMasteryRead,
+                                   DocumentMasteryRead)
+from schemas.pagination import CursorPage
+from util.pagination import MAX_PAGE_SIZE
 
 def get_user_progress_router() -> APIRouter:
     router = APIRouter()
@@ -24,15 +28,78 @@ def get_user_progress_router() -> APIRouter:
 
     @router.get(
         "/",
-        response_model=List[UserProgressRead],
+        response_model=CursorPage[UserProgressRead],
         name="user_progress:list_user_progress",
     )
     async def list_user_progress(
-        limit: int = 100,
-        offset: int = 0,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        manager: UserProgressManager = Depends(get_user_progress_manager)
+    ):
+        return await manager.list_user_progress(limit, cursor)
+
+    @router.get(
+        "/learners/{learner_key}",
+        response_model=CursorPage[UserProgressRead],
+        name="user_progress:list_learner_progress",
+    )
+    async def list_learner_progress(
+        learner_key: UUID,
+        progress_status: Optional[Literal["new", "learning", "known", "needs_review"]] = Query(None, alias="status"),
+        question_id: Optional[int] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        manager: UserProgressManager = Depends(get_user_progress_manager)
+    ):
+        """
+        List the progress rows of one learner, most recently updated first, optionally by status or question.
+        """
+        return await manager.list_learner_progress(learner_key, progress_status, question_id, limit, cursor)
+
+    @router.get(
+        "/learners/{learner_key}/review",
+        response_model=List[UserProgressRead],
+        name="user_progress:get_review_queue",
+    )
+    async def get_review_queue(
+        learner_key: UUID,
+        limit: int = Query(20, ge=1, le=200),
+        include_upcoming: bool = False,
+        manager: UserProgressManager = Depends(get_user_progress_manager)
+    ):
+        """
+        The next questions the learner should review, most overdue first. With include_upcoming,
+        questions which are not due yet fill up the list.
+        """
+        return await manager.get_review_queue(learner_key, limit, include_upcoming)
+
+    @router.get(
+        "/learners/{learner_key}/mastery",
+        response_model=LearnerMasteryRead,
+        name="user_progress:get_learner_mastery",
+    )
+    async def get_learner_mastery(
+        learner_key: UUID,
+        manager: UserProgressManager = Depends(get_user_progress_manager)
+    ):
+        """
+        Mastery of the learner per document and in total, read from the precomputed summaries.
+        """
+        return await manager.get_learner_mastery(learner_key)
+
+    @router.get(
+        "/documents/{document_id}/mastery",
+        response_model=DocumentMasteryRead,
+        name="user_progress:get_document_mastery",
+    )
+    async def get_document_mastery(
+        document_id: int,
         manager: UserProgressManager = Depends(get_user_progress_manager)
     ):
-        return await manager.list_user_progress(limit, offset)
+        """
+        Mastery of all learners of the document, read from the precomputed summaries.
+        """
+        return await manager.get_document_mastery(document_id)
 
     @router.post(
         "/",
@@ -46,6 +113,20 @@ def get_user_progress_router() -> APIRouter:
     ):
         return await manager.create_user_progress(user_progress_create)
 
+    @router.post(
+        "/results",
+        response_model=List[UserProgressRead],
+        name="user_progress:apply_results",
+    )
+    async def apply_results(
+        batch: AnswerResultBatch,
+        manager: UserProgressManager = Depends(get_user_progress_manager)
+    ):
+        """
+        Apply graded answers (e.g. a whole quiz) to the progress rows atomically, creating missing rows.
+        """
+        return await manager.apply_results(batch.results)
+
     @router.delete(
         "/{user_progress_id}",
         status_code=status.HTTP_204_NO_CONTENT,
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import FastAPI, Depends, APIRouter, status, Request, Response
 from fastapi_users.router.common import ErrorCode, ErrorModel
@@ -118,10 +118,29 @@ def get_users_router(
     ) -> List[UserRead]:
         return await user_manager.list_users(payload)
 
+    @router.get(
+        "/page",
+        response_model=UserListPage,
+        name="users:list_page",
+        dependencies=[Depends(get_current_superuser)],
+        responses={
+            status.HTTP_401_UNAUTHORIZED: {
+                "description": "Missing token or inactive user.",
+            },
+        },
+    )
+    async def list_users_page(
+        cursor : Optional[str] = None,
+        payload : UserListFilter = Depends(UserListFilter),
+        user_manager: UserManager = Depends(get_user_manager),
+    ) -> UserListPage:
+        return await user_manager.list_users_page(payload, cursor)
+
     @router.get(
         "/page/{page_no}",
         response_model=UserListPage,
         name="users:list_paged",
+        deprecated=True,
         dependencies=[Depends(get_current_superuser)],
         responses={
             status.HTTP_401_UNAUTHORIZED: {
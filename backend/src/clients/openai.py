@@ -1,10 +1,87 @@
+import importlib.util
+import logging
 import os
+from typing import Dict, Optional
+
+import httpx
 from openai import AsyncOpenAI
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+logger = logging.getLogger("llm.openai")
+
+# Connection pool shared by all OpenAI calls of this replica
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "600"))
+
+# Alternative chat-completions endpoint, e.g. the mock server in backend/loadtest; empty means api.openai.com
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional[AsyncOpenAI] = None
+_model_clients: Dict[str, OpenAIChatCompletionClient] = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    App-lifetime HTTP client with keep-alive, so TLS handshakes are paid once per connection.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+def get_openai_client() -> AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=os.environ.get("OPENAI_KEY"), base_url=OPENAI_BASE_URL,
+                                     http_client=get_http_client())
+    return _openai_client
+
+def get_model_client(model_name: str, api_key: str) -> OpenAIChatCompletionClient:
+    """
+    Returns the shared AutoGen model client of the given model, created on first use.
+    """
+    model_client = _model_clients.get(model_name)
+    if model_client is None:
+        model_client = OpenAIChatCompletionClient(
+            model=model_name,
+            api_key=api_key,
+            base_url=OPENAI_BASE_URL,
+            http_client=get_http_client(),
+        )
+        _model_clients[model_name] = model_client
+    return model_client
+
+async def close_clients() -> None:
+    """
+    Closes the shared clients, called on application shutdown.
+    """
+    global _http_client, _openai_client
+    for model_client in _model_clients.values():
+        await model_client.close()
+    _model_clients.clear()
+    _openai_client = None
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 async def run_llm_prompt(prompt : str) -> str:
     model_name = os.environ["OPENAI_MODEL_NAME"]
-    client = AsyncOpenAI(api_key=os.environ.get("OPENAI_KEY"),)
-    print(f"OpenAI prompt [{model_name}]: {prompt}")
+    client = get_openai_client()
+    # Prompts and completions may contain user data, only their size is logged
+    logger.info(f"OpenAI prompt [{model_name}]: {len(prompt)} characters")
     chat_completion = await client.chat.completions.create(
         messages=[
             {
@@ -14,5 +91,6 @@ async def run_llm_prompt(prompt : str) -> str:
         ],
         model=model_name,
     )
-    print(f"OpenAI returned {chat_completion}")
-    return chat_completion.choices[0].message.content
+    content = chat_completion.choices[0].message.content
+    logger.info(f"OpenAI returned [{model_name}]: {len(content or '')} characters, usage {chat_completion.usage}")
+    return content
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+from fastapi import Depends
+
+from core.grading import GradingManager, get_grading_manager, QUESTION_NOT_FOUND
+from core.user_progress import UserProgressManager, get_user_progress_manager
+from data_access.user_answers import UserAnswerDatabase, get_user_answer_db
+from schemas.questions import GradeItem
+from schemas.user_answers import AnswerSubmission, AnswerSubmissionItem, AnswerSubmissionResult
+from schemas.user_progress import AnswerResult
+
+class AnswerSubmissionManager:
+    """
+    Stores, grades and scores a learner's answers in one request: the answers are graded first
+    (without holding a database connection), then the user_answers rows and the progress
+    upsert are written in a single transaction.
+    """
+
+    def __init__(self, grading: GradingManager, user_answer_db: UserAnswerDatabase,
+                 user_progress_manager: UserProgressManager):
+        self.grading = grading
+        self.user_answer_db = user_answer_db
+        self.user_progress_manager = user_progress_manager
+
+    async def submit_answers(self, submission: AnswerSubmission) -> AnswerSubmissionResult:
+        now = datetime.now(timezone.utc)
+        answers = submission.answers
+        grades = (await self.grading.grade_answers([
+            GradeItem(question_id=answer.question_id, user_answer=answer.user_answer) for answer in answers
+        ])).results
+
+        # Answers to unknown questions are reported but not stored
+        stored = [index for index, grade in enumerate(grades) if grade.error != QUESTION_NOT_FOUND]
+        user_answers = await self.user_answer_db.create_many([{
+            "learner_key": submission.learner_key,
+            "question_id": answers[index].question_id,
+            "user_answer": answers[index].user_answer,
+            "answered_at": answers[index].answered_at or now,
+        } for index in stored])
+        # create_many returns the rows in insertion order, so they map back by position
+        answer_ids = {index: user_answer.user_answer_id for index, user_answer in zip(stored, user_answers)}
+
+        # Ungradable answers (no reference answer, grader failure) do not move the progress
+        results = [
+            AnswerResult(
+                learner_key=submission.learner_key,
+                question_id=answers[index].question_id,
+                score=min(100, max(0, round(grades[index].score * 100))),
+                answered_at=answers[index].answered_at or now,
+            )
+            for index in stored if grades[index].error is None and grades[index].score is not None
+        ]
+        # Commits the answers together with the progress
+        progress = await self.user_progress_manager.apply_results(results) if results else []
+        await self.user_answer_db.commit()
+
+        return AnswerSubmissionResult(
+            items=[
+                AnswerSubmissionItem(user_answer_id=answer_ids.get(index), question_id=answer.question_id, grade=grade)
+                for index, (answer, grade) in enumerate(zip(answers, grades))
+            ],
+            progress=progress,
+        )
+
+async def get_answer_submission_manager(grading: GradingManager = Depends(get_grading_manager),
+                                        user_answer_db: UserAnswerDatabase = Depends(get_user_answer_db),
+                                        user_progress_manager: UserProgressManager = Depends(get_user_progress_manager)):
+    yield AnswerSubmissionManager(grading, user_answer_db, user_progress_manager)
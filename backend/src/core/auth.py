@@ -83,6 +83,14 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
             return UserListPage(content=[user_to_user_read(result) for result in results[:PAGE_SIZE]],
                                 is_more_data_available=len(results)>PAGE_SIZE)
 
+    async def list_users_page(self, filter : UserListFilter, cursor : Optional[str] = None) -> UserListPage:
+        results, next_cursor = await self.user_db.list_users_page(filter.is_active,
+                                                                  filter.rec_date_start, filter.rec_date_end,
+                                                                  filter.text_filter, cursor, PAGE_SIZE)
+        return UserListPage(content=[user_to_user_read(result) for result in results],
+                            is_more_data_available=next_cursor is not None,
+                            next_cursor=next_cursor)
+
 
 
 async def get_user_manager(user_db: SQLAlchemyUserDatabase[User, uuid.UUID] = Depends(get_user_db)):
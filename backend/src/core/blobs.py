@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Dict, Callable, Protocol
+
+# Root directory of the local filesystem blob store
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "/data/blobs")
+
+# Blob store implementation, see BLOB_STORE_BACKENDS
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+
+# Size of the chunks used when copying and streaming blobs
+BLOB_CHUNK_SIZE = 256 * 1024
+
+class BlobStore(Protocol):
+    """
+    Storage for binary document content kept outside of database rows.
+    Keys are opaque strings chosen by the caller (we use content hashes).
+    """
+
+    async def put(self, key: str, source_path: str) -> None: ...
+
+    async def exists(self, key: str) -> bool: ...
+
+    async def size(self, key: str) -> int: ...
+
+    def stream(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        """
+        Yields the bytes [start, end] (inclusive, end=None means until the end of the blob).
+        """
+        ...
+
+    async def delete(self, key: str) -> None: ...
+
+class LocalBlobStore:
+    """
+    Blob store on a local (or mounted) filesystem. Blobs are fanned out into
+    two levels of subdirectories to keep directory listings short.
+    """
+
+    def __init__(self, root: str = BLOB_STORE_PATH):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[0:2] / key[2:4] / key
+
+    def _copy(self, source_path: str, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as dst, open(source_path, "rb") as src:
+                while chunk := src.read(BLOB_CHUNK_SIZE):
+                    dst.write(chunk)
+            os.replace(tmp_path, target)
+        except:
+            os.remove(tmp_path)
+            raise
+
+    async def put(self, key: str, source_path: str) -> None:
+        target = self._path(key)
+        if target.exists():
+            return
+        await asyncio.to_thread(self._copy, source_path, target)
+
+    async def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    async def size(self, key: str) -> int:
+        return (await asyncio.to_thread(os.stat, self._path(key))).st_size
+
+    async def stream(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                to_read = BLOB_CHUNK_SIZE if remaining is None else min(BLOB_CHUNK_SIZE, remaining)
+                chunk = await asyncio.to_thread(f.read, to_read)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, key: str) -> None:
+        path = self._path(key)
+        if path.exists():
+            await asyncio.to_thread(os.remove, path)
+
+BLOB_STORE_BACKENDS: Dict[str, Callable[[], BlobStore]] = {
+    "local": LocalBlobStore,
+}
+
+blob_store: BlobStore = BLOB_STORE_BACKENDS[BLOB_STORE_BACKEND]()
+
+async def get_blob_store():
+    yield blob_store
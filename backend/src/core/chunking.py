@@ -0,0 +1,81 @@
+import logging
+import os
+import re
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger("llm.chunking")
+
+# tiktoken is in requirements.txt; without it chunk sizes are estimated from the text length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+    logger.warning("tiktoken is not installed, chunk token counts are estimated at ~4 characters per token")
+
+# Token budget of a single chunk of document text (the prompt itself comes on top)
+CHUNK_MAX_TOKENS = int(os.getenv("QUESTION_CHUNK_TOKENS", "6000"))
+
+# Tokens of trailing paragraphs repeated at the start of the next chunk
+CHUNK_OVERLAP_TOKENS = int(os.getenv("QUESTION_CHUNK_OVERLAP_TOKENS", "300"))
+
+# Marker line inserted by PDFProcessor before every text block: !!<page_no>,<y_coordinate>!!
+MARKER_RE = re.compile(r"^!!\d+,-?\d+!!$")
+
+def get_token_counter(model_name: str) -> Callable[[str], int]:
+    """
+    Returns a token counting function for the model, falling back to
+    ~4 characters per token when tiktoken is not installed.
+    """
+    if tiktoken is None:
+        return lambda text: len(text) // 4 + 1
+    try:
+        encoding = tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+def split_paragraphs(text_data: str) -> List[str]:
+    """
+    Splits extracted document text into paragraphs, each starting with its marker line.
+    """
+    paragraphs: List[str] = []
+    current: List[str] = []
+    for line in text_data.split("\n"):
+        if MARKER_RE.match(line) and current:
+            paragraphs.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        paragraphs.append("\n".join(current))
+    return paragraphs
+
+def chunk_document_text(text_data: str, count_tokens: Callable[[str], int],
+                        max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    Groups paragraphs into chunks of at most `max_tokens` tokens, never splitting a paragraph
+    (a single oversized paragraph becomes its own chunk). Consecutive chunks share up to
+    `overlap_tokens` tokens of paragraphs so that topics crossing a boundary keep their context.
+    """
+    sized: List[Tuple[str, int]] = [(p, count_tokens(p)) for p in split_paragraphs(text_data) if p.strip()]
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+
+    for paragraph, tokens in sized:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(p for p, _ in current))
+            # Carry the tail of the finished chunk over as overlap
+            tail: List[Tuple[str, int]] = []
+            tail_tokens = 0
+            for p, t in reversed(current):
+                if tail_tokens + t > overlap_tokens or tail_tokens + t + tokens > max_tokens:
+                    break
+                tail.insert(0, (p, t))
+                tail_tokens += t
+            current, current_tokens = tail, tail_tokens
+        current.append((paragraph, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunks.append("\n".join(p for p, _ in current))
+    return chunks
@@ -1,18 +1,71 @@
 # pyright: reportCallIssue=false, reportArgumentType=false, reportGeneralTypeIssues=false, reportReturnType=false
 
 import os
+import time
 from typing import Protocol
 
-from fastapi import FastAPI, Request
-
-from sqlalchemy import Table
+from sqlalchemy import Table, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from util.metrics import metrics
 
-# Create the SQLAlchemy engine for async
 SQLALCHEMY_DATABASE_URL = os.environ["DB_CONNECTION"]
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True)
+
+# Connection pool settings, per backend replica
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Size of the asyncpg prepared statement cache (per connection), 0 disables it
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Logs every SQL statement, useful only for debugging
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long callers wait for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db.pool.checkout_wait", time.perf_counter() - start)
+
+connect_args = {}
+if "+asyncpg" in SQLALCHEMY_DATABASE_URL:
+    connect_args["prepared_statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+
+# Create the SQLAlchemy engine for async
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    echo=DB_ECHO,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args,
+)
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.inc("db.pool.checkouts")
+    pool = engine.sync_engine.pool
+    if pool.checkedout() > pool.size():
+        metrics.inc("db.pool.overflow_checkouts")
+
+metrics.gauge("db.pool.size", lambda: engine.sync_engine.pool.size())
+metrics.gauge("db.pool.in_use", lambda: engine.sync_engine.pool.checkedout())
+metrics.gauge("db.pool.overflow", lambda: max(0, engine.sync_engine.pool.overflow()))
 
 # Page size for paged API
 PAGE_SIZE = 30
@@ -35,22 +88,48 @@ class ORMObject(Protocol):
 # Base class for SQLAlchemy models
 Base : ORMObject = declarative_base()
 
-# Dependency to get the database session
-async def get_db(request : Request):
-    yield request.state.db
-
-def add_db_middleware(app : FastAPI):
-    @app.middleware("http")
-    async def db_session_middleware(request: Request, call_next):
-        async with async_session() as session:
-            request.state.db = session
-            try:
-                response = await call_next(request)
+# Session.info key set once the session has written something in its current transaction
+HAS_WRITES_KEY = "has_writes"
+
+@event.listens_for(Session, "after_flush")
+def _on_after_flush(session, flush_context):
+    session.info[HAS_WRITES_KEY] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    # Bulk insert/update/delete statements bypass the unit of work, so flush events do not see them
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[HAS_WRITES_KEY] = True
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_after_transaction_end(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(HAS_WRITES_KEY, None)
+
+# Dependency to get the database session.
+# The session is created per request only for routes depending on it, and it checks out
+# a pooled connection only when the first statement runs. FastAPI runs the teardown of
+# yield dependencies after the response was sent (or fully streamed), so managers commit
+# their writes explicitly; the commit here only catches writes a manager left pending.
+async def get_db():
+    async with async_session() as session:
+        try:
+            yield session
+            if session.info.get(HAS_WRITES_KEY):
                 await session.commit()
-                return response
-            except:
-                await session.rollback()
-                raise
+        except:
+            await session.rollback()
+            raise
+
+async def release_db_connection(session: AsyncSession) -> None:
+    """
+    Ends the current transaction and returns its connection to the pool.
+    Call before long awaits (LLM calls) which do not need the database; the session
+    transparently checks out a new connection when it is used again.
+    Read-only transactions are committed too: a rollback would expire the loaded objects,
+    which the caller still uses afterwards (expire_on_commit is off).
+    """
+    await session.commit()
 
 async def create_db_and_tables():
     async with engine.begin() as conn:
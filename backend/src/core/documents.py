@@ -1,49 +1,97 @@
-from typing import List
+from typing import Optional
 from fastapi import Depends, HTTPException, status
+from schemas.pagination import CursorPage
 from data_access.documents import DocumentDatabase, get_document_db
 from schemas.documents import DocumentRead, DocumentList
 from fastapi import UploadFile
-from models.document import Document
-from core.pdf import PDFProcessor, get_pdf_processor
+from models.document import Document, DOCUMENT_STATUS_INGESTING
+from core.ingestion import IngestionPipeline, get_ingestion_pipeline, INGEST_STALE_SECONDS
+from core.blobs import BlobStore, get_blob_store
+from core.database import release_db_connection
 
 class DocumentManager:
-    def __init__(self, document_db: DocumentDatabase, pdf_processor: PDFProcessor):
+    def __init__(self, document_db: DocumentDatabase, ingestion: IngestionPipeline, blob_store: BlobStore):
         self.document_db = document_db
-        self.pdf_processor = pdf_processor
+        self.ingestion = ingestion
+        self.blob_store = blob_store
 
-    async def get_document(self, document_id: int) -> Document:
-        document = await self.document_db.get(document_id)
+    async def get_document(self, document_id: int, with_text: bool = False) -> Document:
+        document = await self.document_db.get(document_id, with_text)
         if not document:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
         return document
 
-    async def list_documents(self, limit: int = 100, offset: int = 0) -> List[DocumentList]:
-        documents = await self.document_db.list_documents(limit, offset)
-        return [DocumentRead.model_validate(doc, strict=False) for doc in documents]
+    async def get_document_details(self, document_id: int) -> DocumentRead:
+        document = await self.get_document(document_id, with_text=True)
+        return DocumentRead.model_validate(document)
+
+    async def list_documents(self, limit: int = 100, cursor: Optional[str] = None) -> CursorPage[DocumentList]:
+        documents, next_cursor = await self.document_db.list_documents(limit, cursor)
+        return CursorPage[DocumentList](content=[DocumentList.model_validate(doc) for doc in documents], next_cursor=next_cursor)
 
     async def create_document(self, description : str, file_data : UploadFile) -> DocumentRead:
+        if file_data.content_type != "application/pdf":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unsupported file type. Only PDF files are supported."
+            )
+
+        spooled = await self.ingestion.spool(file_data)
         create_dict = {
             "name": file_data.filename,
             "description": description,
             "content_type": file_data.content_type,
-            "data": await file_data.read(),
+            "blob_key": spooled.content_hash,
+            "size": spooled.size,
+            "text_data": "",
+            "content_hash": spooled.content_hash,
+            "status": DOCUMENT_STATUS_INGESTING,
         }
-        if create_dict["content_type"] == "application/pdf":
-            text_data = await self.pdf_processor.extract_text_with_markers(create_dict["data"])
-            create_dict["text_data"] = text_data
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Unsupported file type. Only PDF files are supported."
-            )
-        document = await self.document_db.create(create_dict)
+
+        # Identical content was uploaded before: the new document gets its own row (name,
+        # description, deletion) but shares the blob and the extracted text
+        await self.document_db.lock_blob(spooled.content_hash)
+        existing = await self.document_db.get_by_content_hash(spooled.content_hash, INGEST_STALE_SECONDS)
+        if existing:
+            self.ingestion.discard(spooled.path)
+            # A running extraction updates all ingesting rows of its content
+            create_dict.update(blob_key=existing.blob_key, text_data=existing.text_data, status=existing.status)
+            document = await self.document_db.create(create_dict)
+            await self.document_db.commit()
+            return DocumentRead.model_validate(document).model_copy(update={"is_duplicate": True})
+
+        try:
+            # Blobs are content addressed, so identical uploads share one stored copy
+            await self.blob_store.put(spooled.content_hash, spooled.path)
+            document = await self.document_db.create(create_dict)
+            await self.document_db.commit()
+        except:
+            self.ingestion.discard(spooled.path)
+            raise
+
+        # Text extraction continues in the background, clients poll the document status
+        self.ingestion.submit(spooled.content_hash, spooled.path)
         return DocumentRead.model_validate(document)
 
     async def delete_document(self, document_id: int) -> None:
         document = await self.document_db.get(document_id)
         if not document:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+        blob_key = document.blob_key
         await self.document_db.delete(document)
+        await self.document_db.commit()
+        # Only once the row is gone for good, a failed commit must not leave it without content.
+        # The references are counted under the blob lock, an upload of the same content either
+        # committed its row before or waits until the blob is gone and stores it again
+        await self.document_db.lock_blob(blob_key)
+        if await self.document_db.count_by_blob_key(blob_key) == 0:
+            await self.blob_store.delete(blob_key)
+        await self.document_db.commit()
+
+    async def release_connection(self) -> None:
+        # Streaming a blob takes as long as the client needs, do not hold a pooled connection meanwhile
+        await release_db_connection(self.document_db.session)
 
-async def get_document_manager(document_db: DocumentDatabase = Depends(get_document_db), pdf_processor: PDFProcessor = Depends(get_pdf_processor)):
-    yield DocumentManager(document_db, pdf_processor)
+async def get_document_manager(document_db: DocumentDatabase = Depends(get_document_db), ingestion: IngestionPipeline = Depends(get_ingestion_pipeline),
+                               blob_store: BlobStore = Depends(get_blob_store)):
+    yield DocumentManager(document_db, ingestion, blob_store)
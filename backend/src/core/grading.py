@@ -0,0 +1,86 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import List, Optional
+
+from fastapi import Depends
+from pydantic import ValidationError
+
+from core.database import release_db_connection
+from core.llm import AgentWorkflowEngine, get_agent_workflow_engine
+from core.pregrader import pregrade
+from data_access.questions import QuestionDatabase, get_question_db
+from models.question import Question
+from schemas.questions import GradeItem, GradeResult, GradeBatchResult
+from util.metrics import metrics
+
+logger = logging.getLogger("llm.grading")
+
+# Grader prompt, graded in a single model call per answer (no Verifier round)
+GRADING_TEMPLATE = "prompt1"
+GRADING_AGENT_SUFFIX = "agent2"
+
+# Maximum number of answers graded concurrently by one request
+GRADING_CONCURRENCY = int(os.getenv("GRADING_CONCURRENCY", "8"))
+
+# Error of items whose question does not exist
+QUESTION_NOT_FOUND = "Question not found"
+
+_JSON_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+def parse_grade(question_id: int, output: str) -> GradeResult:
+    # Models occasionally wrap the JSON in a markdown fence despite the instructions
+    payload = json.loads(_JSON_FENCE_RE.sub("", output.strip()))
+    payload["question_id"] = question_id
+    return GradeResult.model_validate(payload)
+
+class GradingManager:
+    def __init__(self, question_db: QuestionDatabase, engine: AgentWorkflowEngine):
+        self.question_db = question_db
+        self.engine = engine
+
+    async def _grade_item(self, item: GradeItem, question: Optional[Question], semaphore: asyncio.Semaphore) -> GradeResult:
+        if question is None:
+            return GradeResult(question_id=item.question_id, error=QUESTION_NOT_FOUND)
+        # Blank, exact and near-exact answers are decided locally, only ambiguous ones cost an LLM call
+        result = pregrade(item.question_id, item.user_answer, question.correct_answer)
+        if result is not None:
+            metrics.inc("grading.rules")
+            return result
+        metrics.inc("grading.llm")
+        arguments = {
+            "question_text": question.question,
+            "user_answer": item.user_answer,
+            "correct_answer": question.correct_answer,
+        }
+        try:
+            async with semaphore:
+                output = await self.engine.run_prompt(GRADING_TEMPLATE, GRADING_AGENT_SUFFIX, arguments)
+            return parse_grade(item.question_id, output)
+        except (ValueError, TypeError, ValidationError) as e:
+            logger.warning(f"Unparsable grading output for question {item.question_id}: {e}")
+            return GradeResult(question_id=item.question_id, error="Unparsable grader output")
+        except Exception as e:
+            logger.warning(f"Grading question {item.question_id} failed: {e}")
+            return GradeResult(question_id=item.question_id, error=f"Error grading answer: {str(e)}")
+
+    async def grade_answers(self, items: List[GradeItem]) -> GradeBatchResult:
+        """
+        Grades a batch of answers concurrently. Results are returned in the order of the items,
+        a failing item does not fail the batch.
+        """
+        questions = await self.question_db.get_many([item.question_id for item in items])
+        # Grading takes seconds, do not hold a pooled connection meanwhile
+        await release_db_connection(self.question_db.session)
+
+        semaphore = asyncio.Semaphore(GRADING_CONCURRENCY)
+        results = await asyncio.gather(*[
+            self._grade_item(item, questions.get(item.question_id), semaphore) for item in items
+        ])
+        return GradeBatchResult(results=list(results))
+
+async def get_grading_manager(question_db: QuestionDatabase = Depends(get_question_db),
+                              engine: AgentWorkflowEngine = Depends(get_agent_workflow_engine)):
+    yield GradingManager(question_db, engine)
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Set
+
+from fastapi import UploadFile
+
+from core.blobs import BlobStore, blob_store
+from core.database import async_session
+from core.pdf import PDFProcessor
+from data_access.documents import DocumentDatabase
+from models.document import DOCUMENT_STATUS_READY, DOCUMENT_STATUS_FAILED
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from the upload while spooling it to disk
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+# Number of PDFs extracted concurrently per backend replica
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Extractions running longer than this are assumed lost (replica stopped) and are not reused by uploads
+INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", "900"))
+
+@dataclass
+class SpooledUpload:
+    path: str
+    # SHA-256 of the upload content, hex encoded
+    content_hash: str
+    size: int
+
+class IngestionPipeline:
+    """
+    Spools uploaded PDFs to temporary files and extracts their text in a worker pool,
+    so that the event loop is never blocked by PyMuPDF.
+    """
+
+    def __init__(self, pdf_processor: PDFProcessor, blob_store: BlobStore, max_workers: int = INGEST_WORKERS):
+        self.pdf_processor = pdf_processor
+        self.blob_store = blob_store
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        # Keep references to running tasks, otherwise they could be garbage collected mid-flight
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def spool(self, file_data: UploadFile) -> SpooledUpload:
+        """
+        Copies the upload to a temporary file chunk by chunk, hashing it on the way.
+        The caller owns the file until it is handed over with submit() or discard().
+        """
+        spool_file = tempfile.NamedTemporaryFile(prefix="ingest-", suffix=".pdf", delete=False)
+        content_hash = hashlib.sha256()
+        size = 0
+        try:
+            while chunk := await file_data.read(INGEST_CHUNK_SIZE):
+                content_hash.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(spool_file.write, chunk)
+        except:
+            spool_file.close()
+            os.remove(spool_file.name)
+            raise
+        spool_file.close()
+        return SpooledUpload(spool_file.name, content_hash.hexdigest(), size)
+
+    async def spool_blob(self, blob_key: str) -> str:
+        spool_file = tempfile.NamedTemporaryFile(prefix="ingest-", suffix=".pdf", delete=False)
+        try:
+            async for chunk in self.blob_store.stream(blob_key):
+                await asyncio.to_thread(spool_file.write, chunk)
+        except:
+            spool_file.close()
+            os.remove(spool_file.name)
+            raise
+        spool_file.close()
+        return spool_file.name
+
+    def discard(self, spool_path: str) -> None:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    def submit(self, content_hash: str, spool_path: str) -> None:
+        """
+        Schedules text extraction of a spooled PDF for every ingesting document with its content.
+        The spool file is removed once done.
+        """
+        task = asyncio.create_task(self._ingest(content_hash, spool_path))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def shutdown(self) -> None:
+        """
+        Stops the running extractions and the worker pools. Their documents stay ingesting
+        and are extracted again by recover() on the next startup.
+        """
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        # Waits for the page ranges already running in the worker processes
+        await asyncio.to_thread(self.pdf_processor.shutdown)
+
+    async def recover(self) -> None:
+        """
+        Extracts again the documents left ingesting by a replica which stopped mid-extraction
+        (its task and spool file are gone). Called on startup; when several replicas start
+        together the same content may be extracted twice, with the same result.
+        """
+        async with async_session() as session:
+            blobs = await DocumentDatabase(session).list_ingesting_blobs()
+        for content_hash, blob_key in blobs:
+            try:
+                spool_path = await self.spool_blob(blob_key)
+            except Exception:
+                logger.exception("Recovering the ingestion of %s failed", blob_key)
+                async with async_session() as session:
+                    await DocumentDatabase(session).update_text_data(content_hash, "", DOCUMENT_STATUS_FAILED)
+                    await session.commit()
+                continue
+            self.submit(content_hash, spool_path)
+
+    async def _ingest(self, content_hash: str, spool_path: str) -> None:
+        try:
+            text_data = await self.pdf_processor.extract_file_text_with_markers(spool_path, self.executor)
+            status = DOCUMENT_STATUS_READY
+        except Exception:
+            logger.exception("Ingestion of %s failed", content_hash)
+            text_data = ""
+            status = DOCUMENT_STATUS_FAILED
+        finally:
+            self.discard(spool_path)
+
+        async with async_session() as session:
+            await DocumentDatabase(session).update_text_data(content_hash, text_data, status)
+            await session.commit()
+
+ingestion_pipeline = IngestionPipeline(PDFProcessor(), blob_store)
+
+async def get_ingestion_pipeline():
+    yield ingestion_pipeline
@@ -1,138 +1,479 @@
+import asyncio
+import json
+import logging
 import os
-from pathlib import Path
-from typing import Dict, Any, Optional
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 
 # AutoGen v0.4 imports
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import TextMessage, ModelClientStreamingChunkEvent
+from autogen_core import CancellationToken
+from autogen_core.models import UserMessage
 
-MAX_RETRIES = 5
-PROMPT_TEMPLATE_PATH = os.path.join(Path(__file__).parent.parent.absolute(), "prompt_templates")
+from clients.openai import get_model_client
+from core.llm_cache import LLMResultCache, llm_result_cache
+from core.llm_usage import LLMUsageTracker, llm_usage
+from core.pregrader import normalize_answer, answer_tokens, token_overlap
+from core.prompt_templates import PromptTemplateRegistry, prompt_templates
+
+# Default number of Processor attempts per run
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+# Per-template attempt budgets, e.g. "prompt1=3,generate_questions=2"
+TEMPLATE_MAX_RETRIES = os.getenv("LLM_TEMPLATE_MAX_RETRIES", "")
+# Wall-clock budget of a whole run, attempts are not started (or are aborted) past it
+DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "300"))
+# Verifier feedback at least this similar to an earlier round ends the run, 0 disables the check
+REPEATED_FEEDBACK_SIMILARITY = float(os.getenv("LLM_REPEATED_FEEDBACK_SIMILARITY", "0.9"))
+# Upper bound for concurrently generated Processor candidates per attempt
+MAX_CANDIDATES = int(os.getenv("LLM_MAX_CANDIDATES", "4"))
+# Template files of the Processor and Verifier agents: <template_name>.agent1 and <template_name>.agent2
+AGENT_SUFFIXES = ("agent1", "agent2")
 API_KEY = os.environ['OPENAI_API_KEY']
 MODEL_NAME = os.environ['OPENAI_MODEL_NAME']
 
+logger = logging.getLogger("llm")
+
+# Why the Processor -> Verifier loop ended, reported as stop_reason
+STOP_VERIFIED = "verified"
+STOP_MAX_RETRIES = "max_retries"
+STOP_DEADLINE = "deadline"
+STOP_REPEATED_FEEDBACK = "repeated_feedback"
+
+VERDICT_INSTRUCTIONS = (
+    "\n\nCRITICAL: You must end your response with a single-line JSON object and nothing after it: "
+    '{"verified": true or false, "feedback": "<what has to be fixed, empty when verified>"}'
+)
+
+_VERDICT_RE = re.compile(r"\{[^{}]*\"verified\"[^{}]*\}", re.DOTALL)
+
+@dataclass
+class RetryPolicy:
+    max_retries: int
+    deadline_seconds: float
+
+def parse_template_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for item in value.split(","):
+        name, _, retries = item.partition("=")
+        if name.strip() and retries.strip().isdigit():
+            budgets[name.strip()] = max(1, int(retries))
+    return budgets
+
+def parse_verdict(verifier_text: str) -> Tuple[str, bool]:
+    """
+    Reads the JSON verdict at the end of a Verifier response. Returns (feedback, is verified);
+    the feedback falls back to the whole response when the verdict carries none.
+    """
+    for match in reversed(_VERDICT_RE.findall(verifier_text)):
+        try:
+            payload = json.loads(match)
+        except ValueError:
+            continue
+        if isinstance(payload.get("verified"), bool):
+            feedback = payload.get("feedback")
+            if not isinstance(feedback, str) or not feedback.strip():
+                feedback = verifier_text
+            return feedback, payload["verified"]
+    # Verifiers which ignored the JSON instruction
+    return verifier_text, "VERIFIED: TRUE" in verifier_text.upper()
+
+def is_repeated_feedback(feedback: str, previous_feedback: List[str],
+                         threshold: float = REPEATED_FEEDBACK_SIMILARITY) -> bool:
+    # Another attempt is unlikely to help when the Verifier keeps asking for the same fix
+    if threshold <= 0:
+        return False
+    tokens = answer_tokens(normalize_answer(feedback))
+    return any(token_overlap(tokens, answer_tokens(normalize_answer(previous))) >= threshold
+               for previous in previous_feedback)
+
 class AgentWorkflowEngine:
     """
     Orchestrates a two-agent flow (Processor and Verifier) using Microsoft AutoGen v0.4.
     """
 
-    def __init__(self):
-        self.template_dir = Path(PROMPT_TEMPLATE_PATH)
+    def __init__(self, templates: PromptTemplateRegistry, result_cache: Optional[LLMResultCache] = None,
+                 usage: Optional[LLMUsageTracker] = None):
+        self.templates = templates
+        self.result_cache = result_cache
+        self.usage = usage
+        self.template_max_retries = parse_template_budgets(TEMPLATE_MAX_RETRIES)
 
         self.model_name = MODEL_NAME
         self.api_key = API_KEY
 
-        # Create the model client reused by agents
-        self.model_client = OpenAIChatCompletionClient(
-            model=self.model_name,
-            api_key=self.api_key,
-        )
+        # The model client (and its HTTP connection pool) is shared for the app lifetime
+        self.model_client = get_model_client(self.model_name, self.api_key)
 
-    def _load_and_render_template(self, template_name: str, agent_suffix: str, context: Dict[str, Any]) -> str:
+    def check_arguments(self, template_name: str, arguments: Dict[str, Any]) -> None:
         """
-        Loads a template file and renders placeholders with provided context.
-        Files are expected to be named: <template_name>.<agent_suffix>
+        Validates the template name and arguments before any LLM call is made.
         """
-        filename = f"{template_name}.{agent_suffix}"
-        file_path = self.template_dir / filename
+        self.templates.check_arguments(template_name, AGENT_SUFFIXES, arguments)
 
-        if not file_path.exists():
-            raise FileNotFoundError(f"Template file not found: {file_path}")
+    async def run_prompt(self, template_name: str, agent_suffix: str, arguments: Dict[str, Any],
+                         cancellation_token: Optional[CancellationToken] = None) -> str:
+        """
+        Renders a single template file and sends it as one model call, without the Processor -> Verifier loop.
+        """
+        self.templates.check_arguments(template_name, (agent_suffix,), arguments)
+        prompt = self.templates.render(template_name, agent_suffix, arguments)
+        start = time.perf_counter()
+        result = await self.model_client.create([UserMessage(content=prompt, source="user")],
+                                                cancellation_token=cancellation_token)
+        self._record_call(template_name, agent_suffix, result.usage, time.perf_counter() - start)
+        return result.content if isinstance(result.content, str) else str(result.content)
 
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            # Use safe format to inject context variables into the prompt
-            return content.format(**context)
-        except KeyError as e:
-            raise ValueError(f"Missing context argument for template {filename}: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Error rendering template {filename}: {e}")
-
-    async def run_flow(self, template_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def retry_policy(self, template_name: str, max_retries: Optional[int] = None,
+                     deadline_seconds: Optional[float] = None) -> RetryPolicy:
         """
-        Executes the Processor -> Verifier loop using AutoGen v0.4 agents.
+        The request may lower, but not raise, the attempt budget and deadline configured for the template.
         """
-        print(f"Running LLM workflow with template: {template_name} and arguments: {arguments} Key: {self.api_key} Model: {self.model_name}")
-        # 1. Load and Render System Prompts
-        processor_system_msg = self._load_and_render_template(template_name, "agent1", arguments)
-        verifier_system_msg = self._load_and_render_template(template_name, "agent2", arguments)
+        budget = self.template_max_retries.get(template_name, MAX_RETRIES)
+        if max_retries is not None:
+            budget = min(budget, max_retries)
+        deadline = DEADLINE_SECONDS if deadline_seconds is None else min(DEADLINE_SECONDS, deadline_seconds)
+        return RetryPolicy(max(1, budget), deadline)
+
+    def _record_call(self, template_name: str, role: str, usage: Any, seconds: float,
+                     verified: Optional[bool] = None) -> None:
+        if self.usage is not None:
+            self.usage.record_call(template_name, role, self.model_name, usage, seconds, verified)
 
-        # 2. Initialize Agents (v0.4 Style)
+    def _record_run(self, template_name: str, result: Dict[str, Any], seconds: float) -> None:
+        if self.usage is not None:
+            self.usage.record_run(template_name, result["attempts_made"], result["success"], result["cached"], seconds)
+
+    def _cache_key(self, template_name: str, arguments: Dict[str, Any]) -> str:
+        template_hash = self.templates.template_hash(template_name, AGENT_SUFFIXES)
+        return self.result_cache.make_key(template_name, template_hash, self.model_name, arguments)
+
+    def _create_agents(self, processor_system_msg: str, verifier_system_msg: str,
+                       stream: bool = False) -> Tuple[AssistantAgent, AssistantAgent]:
         # In v0.4, we inject the model_client directly.
         processor = AssistantAgent(
             name="Processor",
             system_message=processor_system_msg,
             model_client=self.model_client,
+            # Emits ModelClientStreamingChunkEvent for every token batch in on_messages_stream
+            model_client_stream=stream,
         )
 
         verifier = AssistantAgent(
             name="Verifier",
-            system_message=verifier_system_msg + "\n\nCRITICAL: You must end your response with exactly 'VERIFIED: TRUE' or 'VERIFIED: FALSE'.",
+            system_message=verifier_system_msg + VERDICT_INSTRUCTIONS,
             model_client=self.model_client,
         )
+        return processor, verifier
+
+    async def _run_attempt(self, template_name: str, processor: AssistantAgent, verifier: AssistantAgent,
+                           processor_prompt: str, cancellation_token: Optional[CancellationToken]) -> Tuple[str, str, bool]:
+        """
+        Runs one Processor generation followed by its verification.
+        Returns (processor output, verifier feedback, is verified).
+        """
+        # --- Step A: Processor Generates ---
+        # v0.4: Call on_messages directly. No UserProxy needed for programmatic loops.
+        # We wrap the string prompt in a TextMessage with source="user".
+        start = time.perf_counter()
+        proc_response = await processor.on_messages(
+            messages=[TextMessage(content=processor_prompt, source="user")],
+            cancellation_token=cancellation_token
+        )
+        self._record_call(template_name, "processor", proc_response.chat_message.models_usage, time.perf_counter() - start)
+
+        # Extract content from the Response object
+        current_output = proc_response.chat_message.content
+
+        # --- Step B: Verifier Checks ---
+        verifier_text, is_verified = await self._verify(template_name, verifier, current_output, cancellation_token)
+        return current_output, verifier_text, is_verified
+
+    async def _verify(self, template_name: str, verifier: AssistantAgent, current_output: str,
+                      cancellation_token: Optional[CancellationToken]) -> Tuple[str, bool]:
+        """
+        Asks the Verifier to review a Processor output. Returns (verifier feedback, is verified).
+        """
+        verify_prompt = (
+            f"Please review the following output generated by the Processor:\n"
+            f"--- BEGIN OUTPUT ---\n{current_output}\n--- END OUTPUT ---\n\n"
+            f"Is this satisfactory based on your criteria? Provide feedback and end with the JSON verdict."
+        )
+
+        # Note: We create a fresh conversation context for the verifier each time
+        # by passing only the current prompt. The agent logic is stateless here
+        # unless we explicitly maintain a list of previous messages.
+        start = time.perf_counter()
+        ver_response = await verifier.on_messages(
+            messages=[TextMessage(content=verify_prompt, source="user")],
+            cancellation_token=cancellation_token
+        )
+
+        verifier_text = ver_response.chat_message.content
+
+        # --- Step C: Parse the JSON verdict ---
+        feedback, is_verified = parse_verdict(verifier_text)
+        self._record_call(template_name, "verifier", ver_response.chat_message.models_usage,
+                          time.perf_counter() - start, is_verified)
+        return feedback, is_verified
+
+    def _processor_prompt(self, attempt_index: int, verification_feedback: Optional[str]) -> str:
+        # No feedback: the first attempt, or the previous one failed before it was verified
+        if attempt_index == 0 or verification_feedback is None:
+            return "Please perform the task defined in your system instructions."
+        return f"Your previous attempt was rejected. \nVerifier Feedback: {verification_feedback}\n\nPlease try again, fixing these issues."
+
+    async def _run_candidates(self, template_name: str, agents: List[Tuple[AssistantAgent, AssistantAgent]],
+                              processor_prompts: List[str], parent_token: Optional[CancellationToken] = None
+                              ) -> Tuple[Tuple[str, str, bool], List[Optional[Tuple[str, str, bool]]]]:
+        """
+        Runs one attempt per (processor, verifier) pair concurrently, each with its own prompt,
+        and returns (chosen result, result of every candidate). The chosen result is the first
+        verified one, the remaining LLM calls are then cancelled through a shared cancellation
+        token; if no candidate verifies, it is the first rejected one. Candidates which failed
+        or were cancelled have no result.
+        """
+        cancellation_token = CancellationToken()
+        if parent_token is not None:
+            parent_token.add_callback(cancellation_token.cancel)
+        tasks = [
+            asyncio.create_task(self._run_attempt(template_name, processor, verifier, prompt, cancellation_token))
+            for (processor, verifier), prompt in zip(agents, processor_prompts)
+        ]
+        index_of = {task: index for index, task in enumerate(tasks)}
+        results: List[Optional[Tuple[str, str, bool]]] = [None] * len(tasks)
+        chosen: Optional[Tuple[str, str, bool]] = None
+        errors: List[BaseException] = []
+        pending = set(tasks)
+        try:
+            while pending and not (chosen is not None and chosen[2]):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=index_of.get):
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    result = results[index_of[task]] = task.result()
+                    if chosen is None or (result[2] and not chosen[2]):
+                        chosen = result
+        finally:
+            cancellation_token.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if chosen is None:
+            if errors:
+                raise errors[0]
+            raise asyncio.CancelledError()
+        return chosen, results
+
+    async def run_flow(self, template_name: str, arguments: Dict[str, Any], candidates: int = 1,
+                       use_cache: bool = True, cancellation_token: Optional[CancellationToken] = None,
+                       max_retries: Optional[int] = None, deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Executes the workflow, answering from the result cache when the same template,
+        model and (canonicalized) arguments were already run successfully.
+        Cancelling `cancellation_token` aborts the in-flight model calls.
+        """
+        self.check_arguments(template_name, arguments)
+        start = time.perf_counter()
+        policy = self.retry_policy(template_name, max_retries, deadline_seconds)
+        if not use_cache or self.result_cache is None:
+            result = await self._execute_flow(template_name, arguments, candidates, cancellation_token, policy)
+            self._record_run(template_name, result, time.perf_counter() - start)
+            return result
+
+        cache_key = self._cache_key(template_name, arguments)
+        cached = await self.result_cache.get(cache_key)
+        if cached is not None:
+            result = {**cached, "cached": True}
+            self._record_run(template_name, result, time.perf_counter() - start)
+            return result
+
+        result = await self._execute_flow(template_name, arguments, candidates, cancellation_token, policy)
+        self._record_run(template_name, result, time.perf_counter() - start)
+        # Rejected outputs are not cached, a new run may well succeed
+        if result["success"]:
+            await self.result_cache.put(cache_key, template_name, result)
+        return result
+
+    async def _execute_flow(self, template_name: str, arguments: Dict[str, Any], candidates: int = 1,
+                            cancellation_token: Optional[CancellationToken] = None,
+                            policy: Optional[RetryPolicy] = None) -> Dict[str, Any]:
+        """
+        Executes the Processor -> Verifier loop using AutoGen v0.4 agents.
+
+        With candidates > 1, every round generates that many Processor outputs concurrently,
+        each verified as soon as it is ready, and the first verified one wins.
+        The loop ends once an output is verified, the attempt budget or deadline of the policy
+        is used up, or the Verifier repeats feedback it already gave.
+        """
+        policy = policy or self.retry_policy(template_name)
+        deadline = time.monotonic() + policy.deadline_seconds
+        logger.info(f"Running LLM workflow with template: {template_name} Model: {self.model_name} Candidates: {candidates}")
+        # 1. Load and Render System Prompts
+        processor_system_msg = self.templates.render(template_name, "agent1", arguments)
+        verifier_system_msg = self.templates.render(template_name, "agent2", arguments)
+
+        # 2. Initialize Agents (v0.4 Style), one Processor/Verifier pair per candidate.
+        # Agents keep their conversation, so each candidate sees its own previous attempts.
+        candidates = max(1, min(candidates, MAX_CANDIDATES))
+        agents = [self._create_agents(processor_system_msg, verifier_system_msg) for _ in range(candidates)]
 
         final_output = ""
+        current_output = ""
         verification_feedback = ""
         is_verified = False
         attempts = 0
+        previous_feedback: List[str] = []
+        stop_reason = STOP_MAX_RETRIES
+        # Every Processor is asked to fix what its own Verifier found in its own previous output
+        candidate_feedback: List[Optional[str]] = [None] * candidates
 
         # 3. Execution Loop
-        for i in range(MAX_RETRIES):
+        for i in range(policy.max_retries):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                stop_reason = STOP_DEADLINE
+                break
             attempts += 1
-            
-            # --- Step A: Processor Generates ---
-            if i == 0:
-                processor_prompt = "Please perform the task defined in your system instructions."
-            else:
-                processor_prompt = f"Your previous attempt was rejected. \nVerifier Feedback: {verification_feedback}\n\nPlease try again, fixing these issues."
-
-            # v0.4: Call on_messages directly. No UserProxy needed for programmatic loops.
-            # We wrap the string prompt in a TextMessage with source="user".
-            proc_response = await processor.on_messages(
-                messages=[TextMessage(content=processor_prompt, source="user")],
-                cancellation_token=None
-            )
-            
-            # Extract content from the Response object
-            current_output = proc_response.chat_message.content
-            
-            # --- Step B: Verifier Checks ---
-            verify_prompt = (
-                f"Please review the following output generated by the Processor:\n"
-                f"--- BEGIN OUTPUT ---\n{current_output}\n--- END OUTPUT ---\n\n"
-                f"Is this satisfactory based on your criteria? Provide feedback and end with VERIFIED: TRUE/FALSE."
-            )
-
-            # Note: We create a fresh conversation context for the verifier each time
-            # by passing only the current prompt. The agent logic is stateless here
-            # unless we explicitly maintain a list of previous messages.
-            ver_response = await verifier.on_messages(
-                messages=[TextMessage(content=verify_prompt, source="user")],
-                cancellation_token=None
-            )
-
-            verifier_text = ver_response.chat_message.content
-
-            # --- Step C: Parse Boolean Result ---
-            if "VERIFIED: TRUE" in verifier_text.upper():
+
+            processor_prompts = [self._processor_prompt(i, feedback) for feedback in candidate_feedback]
+
+            try:
+                if candidates == 1:
+                    processor, verifier = agents[0]
+                    current_output, verification_feedback, is_verified = await asyncio.wait_for(
+                        self._run_attempt(template_name, processor, verifier, processor_prompts[0], cancellation_token),
+                        remaining)
+                    candidate_feedback[0] = verification_feedback
+                else:
+                    (current_output, verification_feedback, is_verified), results = await asyncio.wait_for(
+                        self._run_candidates(template_name, agents, processor_prompts, cancellation_token), remaining)
+                    candidate_feedback = [result[1] if result is not None else None for result in results]
+            except asyncio.TimeoutError:
+                stop_reason = STOP_DEADLINE
+                break
+
+            if is_verified:
                 final_output = current_output
-                is_verified = True
-                verification_feedback = verifier_text
+                stop_reason = STOP_VERIFIED
+                break
+            if is_repeated_feedback(verification_feedback, previous_feedback):
+                stop_reason = STOP_REPEATED_FEEDBACK
                 break
-            else:
-                verification_feedback = verifier_text
-                # Loop continues for retry
+            previous_feedback.append(verification_feedback)
+            # Loop continues for retry
 
         return {
             "template_used": template_name,
             "attempts_made": attempts,
+            "candidates_per_attempt": candidates,
             "success": is_verified,
             "final_processor_output": final_output if is_verified else current_output,
-            "final_verifier_feedback": verification_feedback
+            "final_verifier_feedback": verification_feedback,
+            "stop_reason": stop_reason,
+            "cached": False,
         }
     
+    async def run_flow_stream(self, template_name: str, arguments: Dict[str, Any], use_cache: bool = True,
+                              max_retries: Optional[int] = None,
+                              deadline_seconds: Optional[float] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of run_flow yielding (event, data) pairs:
+        "attempt" when a Processor attempt starts, "token" for every streamed chunk of its output,
+        "verdict" after each verification and a final "result" with the same payload as run_flow.
+        """
+        self.check_arguments(template_name, arguments)
+        start = time.perf_counter()
+        cache_key = None
+        if use_cache and self.result_cache is not None:
+            cache_key = self._cache_key(template_name, arguments)
+            cached = await self.result_cache.get(cache_key)
+            if cached is not None:
+                result = {**cached, "cached": True}
+                self._record_run(template_name, result, time.perf_counter() - start)
+                yield "result", result
+                return
+
+        processor, verifier = self._create_agents(self.templates.render(template_name, "agent1", arguments),
+                                                  self.templates.render(template_name, "agent2", arguments),
+                                                  stream=True)
+        policy = self.retry_policy(template_name, max_retries, deadline_seconds)
+        deadline = time.monotonic() + policy.deadline_seconds
+        # Cancelled when the client disconnects or the deadline passes, which aborts the in-flight model call
+        cancellation_token = CancellationToken()
+        current_output = ""
+        verification_feedback = ""
+        is_verified = False
+        attempts = 0
+        previous_feedback: List[str] = []
+        stop_reason = STOP_MAX_RETRIES
+        try:
+            for i in range(policy.max_retries):
+                if time.monotonic() >= deadline:
+                    stop_reason = STOP_DEADLINE
+                    break
+                attempts += 1
+                yield "attempt", {"attempt": attempts}
+
+                call_start = time.perf_counter()
+                async for event in processor.on_messages_stream(
+                    messages=[TextMessage(content=self._processor_prompt(i, verification_feedback), source="user")],
+                    cancellation_token=cancellation_token
+                ):
+                    if isinstance(event, ModelClientStreamingChunkEvent):
+                        yield "token", {"attempt": attempts, "content": event.content}
+                        if time.monotonic() >= deadline:
+                            stop_reason = STOP_DEADLINE
+                            break
+                    elif isinstance(event, Response):
+                        current_output = event.chat_message.content
+                        self._record_call(template_name, "processor", event.chat_message.models_usage,
+                                          time.perf_counter() - call_start)
+                if stop_reason == STOP_DEADLINE:
+                    break
+
+                try:
+                    verification_feedback, is_verified = await asyncio.wait_for(
+                        self._verify(template_name, verifier, current_output, cancellation_token),
+                        max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    stop_reason = STOP_DEADLINE
+                    break
+                yield "verdict", {"attempt": attempts, "verified": is_verified, "feedback": verification_feedback}
+                if is_verified:
+                    stop_reason = STOP_VERIFIED
+                    break
+                if is_repeated_feedback(verification_feedback, previous_feedback):
+                    stop_reason = STOP_REPEATED_FEEDBACK
+                    break
+                previous_feedback.append(verification_feedback)
+        finally:
+            cancellation_token.cancel()
+
+        result = {
+            "template_used": template_name,
+            "attempts_made": attempts,
+            "candidates_per_attempt": 1,
+            "success": is_verified,
+            "final_processor_output": current_output,
+            "final_verifier_feedback": verification_feedback,
+            "stop_reason": stop_reason,
+            "cached": False,
+        }
+        self._record_run(template_name, result, time.perf_counter() - start)
+        if cache_key is not None and is_verified:
+            await self.result_cache.put(cache_key, template_name, result)
+        yield "result", result
+
+def create_agent_workflow_engine() -> AgentWorkflowEngine:
+    return AgentWorkflowEngine(prompt_templates, llm_result_cache, llm_usage)
+
 async def get_agent_workflow_engine():
-    yield AgentWorkflowEngine()
+    yield create_agent_workflow_engine()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from core.database import async_session
+from data_access.llm_cache import LLMCacheDatabase
+
+logger = logging.getLogger("llm.cache")
+
+# How long a cached workflow result stays valid
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Maximum number of results kept in the in-process tier
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+# Whether the Postgres tier shared by all replicas is used
+LLM_CACHE_SHARED = os.getenv("LLM_CACHE_SHARED", "true").lower() == "true"
+
+# Expired shared entries are purged once every this many writes
+LLM_CACHE_PURGE_EVERY = 100
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _canonicalize(value: Any) -> Any:
+    # Leading/trailing and repeated whitespace does not change the meaning of an argument
+    if isinstance(value, str):
+        return _WHITESPACE_RE.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    return value
+
+class LLMResultCache:
+    """
+    Two-tier cache of successful workflow results: a TTL-bound LRU in process memory
+    in front of a Postgres table shared by all backend replicas.
+    """
+
+    def __init__(self, ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 shared: bool = LLM_CACHE_SHARED):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.shared = shared
+        self.memory: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.writes = 0
+
+    def make_key(self, template_name: str, template_hash: str, model_name: str, arguments: Dict[str, Any]) -> str:
+        canonical_arguments = json.dumps(_canonicalize(arguments), sort_keys=True, separators=(",", ":"),
+                                         ensure_ascii=False, default=str)
+        payload = "\0".join([template_name, template_hash, model_name, canonical_arguments])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_memory(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self.memory[cache_key]
+            return None
+        self.memory.move_to_end(cache_key)
+        return result
+
+    def _put_memory(self, cache_key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+        self.memory[cache_key] = (time.monotonic() + ttl_seconds, result)
+        self.memory.move_to_end(cache_key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        result = self._get_memory(cache_key)
+        if result is not None or not self.shared:
+            return result
+
+        try:
+            async with async_session() as session:
+                result = await LLMCacheDatabase(session).get(cache_key)
+        except Exception as e:
+            # The cache must never fail a request, worst case we call the LLM
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        if result is not None:
+            # The shared entry may be older, but keeping it locally for the full TTL is close enough
+            self._put_memory(cache_key, result, self.ttl_seconds)
+        return result
+
+    async def put(self, cache_key: str, template_name: str, result: Dict[str, Any]) -> None:
+        self._put_memory(cache_key, result, self.ttl_seconds)
+        if not self.shared:
+            return
+
+        self.writes += 1
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        try:
+            async with async_session() as session:
+                cache_db = LLMCacheDatabase(session)
+                await cache_db.put(cache_key, template_name, result, expires_at)
+                if self.writes % LLM_CACHE_PURGE_EVERY == 0:
+                    await cache_db.delete_expired()
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+llm_result_cache = LLMResultCache()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from autogen_core import CancellationToken
+from fastapi import Depends, HTTPException, status
+
+from core.database import async_session
+from core.llm import AgentWorkflowEngine, create_agent_workflow_engine, get_agent_workflow_engine
+from data_access.llm_jobs import LLMJobDatabase, get_llm_job_db
+from models.llm_job import LLMJob, LLM_JOB_FINISHED_STATUSES
+from schemas.llm import LLMJobCreate, LLMJobResult
+from util.metrics import metrics
+
+logger = logging.getLogger("llm.jobs")
+
+# Number of jobs run concurrently per backend replica, 0 disables the worker
+LLM_JOB_CONCURRENCY = int(os.getenv("LLM_JOB_CONCURRENCY", "2"))
+
+# How often an idle worker polls the queue
+LLM_JOB_POLL_SECONDS = float(os.getenv("LLM_JOB_POLL_SECONDS", "1"))
+
+# A job whose lease is not renewed within this time is picked up by another worker
+LLM_JOB_LEASE_SECONDS = int(os.getenv("LLM_JOB_LEASE_SECONDS", "60"))
+
+# Runs per job (first run included) before it is marked as failed
+LLM_JOB_MAX_ATTEMPTS = int(os.getenv("LLM_JOB_MAX_ATTEMPTS", "3"))
+
+# Delay before the first retry, doubled with every further attempt
+LLM_JOB_RETRY_BASE_SECONDS = float(os.getenv("LLM_JOB_RETRY_BASE_SECONDS", "5"))
+
+# Submissions are rejected while this many jobs are waiting
+LLM_JOB_MAX_QUEUED = int(os.getenv("LLM_JOB_MAX_QUEUED", "1000"))
+
+class LLMJobWorker:
+    """
+    Runs queued LLM workflow jobs from the llm_jobs table. Every backend replica runs one worker;
+    jobs are claimed with FOR UPDATE SKIP LOCKED and held through a lease renewed by a heartbeat,
+    so a job of a crashed replica is picked up again once its lease expires.
+    """
+
+    def __init__(self, engine_factory: Callable[[], AgentWorkflowEngine], concurrency: int = LLM_JOB_CONCURRENCY,
+                 poll_seconds: float = LLM_JOB_POLL_SECONDS, lease_seconds: int = LLM_JOB_LEASE_SECONDS):
+        self.engine_factory = engine_factory
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self.slots = asyncio.Semaphore(concurrency)
+        self.wakeup = asyncio.Event()
+        self.poller: Optional[asyncio.Task] = None
+        self.stopping = False
+        # Cancellation handles of the running jobs, used by the heartbeat and on shutdown
+        self.running: Dict[UUID, Tuple[CancellationToken, asyncio.Task]] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        metrics.gauge("llm_jobs.running", lambda: len(self.running))
+
+    def start(self) -> None:
+        if self.concurrency > 0 and self.poller is None:
+            self.stopping = False
+            self.poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        """
+        Stops polling and hands the running jobs back to the queue.
+        """
+        self.stopping = True
+        if self.poller is not None:
+            self.poller.cancel()
+            await asyncio.gather(self.poller, return_exceptions=True)
+            self.poller = None
+        for token, flow in list(self.running.values()):
+            token.cancel()
+            flow.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        # Jobs submitted to this replica are picked up without waiting for the next poll
+        self.wakeup.set()
+
+    async def _poll(self) -> None:
+        while True:
+            await self.slots.acquire()
+            self.wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.warning(f"Claiming an LLM job failed: {e}")
+                job = None
+
+            if job is None:
+                self.slots.release()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run(job))
+            self.tasks.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        self.slots.release()
+
+    async def _claim(self) -> Optional[LLMJob]:
+        async with async_session() as session:
+            job = await LLMJobDatabase(session).claim(self.worker_id, self.lease_seconds)
+            await session.commit()
+            return job
+
+    async def _heartbeat(self, job_id: UUID, token: CancellationToken, flow: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with async_session() as session:
+                    cancel_requested = await LLMJobDatabase(session).extend_lease(job_id, self.worker_id, self.lease_seconds)
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Renewing the lease of LLM job {job_id} failed: {e}")
+                continue
+            # None: the lease was lost to another worker, the result would be discarded anyway
+            if cancel_requested is None or cancel_requested:
+                token.cancel()
+                flow.cancel()
+                return
+
+    def _retry_delay(self, attempts: int) -> float:
+        return LLM_JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)
+
+    async def _run(self, job: LLMJob) -> None:
+        engine = self.engine_factory()
+        token = CancellationToken()
+        flow = asyncio.create_task(
+            engine.run_flow(job.template_name, job.arguments, job.candidates, job.use_cache, token,
+                            job.max_retries, job.deadline_seconds)
+        )
+        self.running[job.job_id] = (token, flow)
+        heartbeat = asyncio.create_task(self._heartbeat(job.job_id, token, flow))
+        start = time.perf_counter()
+        try:
+            result = await flow
+            outcome = "completed"
+        except asyncio.CancelledError:
+            outcome = "requeued" if self.stopping else "cancelled"
+        except HTTPException as e:
+            # Invalid template or arguments, running the job again would not help
+            outcome, error = "failed", str(e.detail)
+        except Exception as e:
+            error = f"Error executing workflow: {str(e)}"
+            outcome = "retried" if job.attempts < job.max_attempts else "failed"
+        finally:
+            heartbeat.cancel()
+            self.running.pop(job.job_id, None)
+
+        metrics.inc(f"llm_jobs.{outcome}")
+        metrics.observe("llm_jobs.run", time.perf_counter() - start)
+        async with async_session() as session:
+            job_db = LLMJobDatabase(session)
+            if outcome == "completed":
+                await job_db.complete(job.job_id, self.worker_id, result)
+            elif outcome == "cancelled":
+                await job_db.mark_cancelled(job.job_id, self.worker_id)
+            elif outcome == "requeued":
+                await job_db.requeue(job.job_id, self.worker_id)
+            elif outcome == "retried":
+                logger.warning(f"LLM job {job.job_id} attempt {job.attempts} failed, retrying: {error}")
+                await job_db.retry(job.job_id, self.worker_id, error, self._retry_delay(job.attempts))
+            else:
+                await job_db.fail(job.job_id, self.worker_id, error)
+            await session.commit()
+
+llm_job_worker = LLMJobWorker(create_agent_workflow_engine)
+
+class LLMJobManager:
+    def __init__(self, job_db: LLMJobDatabase, engine: AgentWorkflowEngine, worker: LLMJobWorker):
+        self.job_db = job_db
+        self.engine = engine
+        self.worker = worker
+
+    async def submit_job(self, job_data: LLMJobCreate) -> LLMJob:
+        # Unknown templates and missing arguments are rejected before anything is queued
+        self.engine.check_arguments(job_data.template_name, job_data.arguments)
+        if await self.job_db.count_queued() >= LLM_JOB_MAX_QUEUED:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many queued jobs, try again later")
+
+        create_dict = job_data.model_dump()
+        if create_dict["max_attempts"] is None:
+            create_dict["max_attempts"] = LLM_JOB_MAX_ATTEMPTS
+        job = await self.job_db.create(create_dict)
+        await self.job_db.commit()
+        self.worker.notify()
+        return job
+
+    async def get_job(self, job_id: UUID) -> LLMJob:
+        job = await self.job_db.get(job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    async def get_job_result(self, job_id: UUID) -> LLMJobResult:
+        job = await self.get_job(job_id)
+        if job.status not in LLM_JOB_FINISHED_STATUSES:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+        return LLMJobResult.model_validate(job)
+
+    async def cancel_job(self, job_id: UUID) -> LLMJob:
+        job_status = await self.job_db.cancel(job_id)
+        if job_status is None:
+            job = await self.get_job(job_id)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}")
+        await self.job_db.commit()
+        return await self.get_job(job_id)
+
+async def get_llm_job_manager(job_db: LLMJobDatabase = Depends(get_llm_job_db),
+                              engine: AgentWorkflowEngine = Depends(get_agent_workflow_engine)):
+    yield LLMJobManager(job_db, engine, llm_job_worker)
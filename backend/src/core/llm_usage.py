@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, Optional
+
+from util.metrics import metrics
+
+# Length of the window summarized by the rolling usage summary
+LLM_USAGE_WINDOW_SECONDS = int(os.getenv("LLM_USAGE_WINDOW_SECONDS", "3600"))
+
+# Upper bound of the records kept for the rolling summary
+LLM_USAGE_MAX_RECORDS = int(os.getenv("LLM_USAGE_MAX_RECORDS", "100000"))
+
+# Model prices in USD per million tokens, used for the cost estimate
+LLM_PROMPT_TOKEN_PRICE = float(os.getenv("LLM_PROMPT_TOKEN_PRICE", "0"))
+LLM_COMPLETION_TOKEN_PRICE = float(os.getenv("LLM_COMPLETION_TOKEN_PRICE", "0"))
+
+logger = logging.getLogger("llm.usage")
+
+@dataclass
+class LLMCallRecord:
+    timestamp: float
+    template_name: str
+    # processor, verifier or the template file suffix of a single-call prompt
+    role: str
+    model_name: str
+    prompt_tokens: int
+    completion_tokens: int
+    seconds: float
+    # Verdict of verifier calls
+    verified: Optional[bool] = None
+
+@dataclass
+class LLMRunRecord:
+    timestamp: float
+    template_name: str
+    attempts: int
+    success: bool
+    cached: bool
+    seconds: float
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return (prompt_tokens * LLM_PROMPT_TOKEN_PRICE + completion_tokens * LLM_COMPLETION_TOKEN_PRICE) / 1_000_000
+
+def _usage_tokens(usage: Any) -> tuple:
+    # AutoGen reports RequestUsage on responses; missing usage (e.g. some streams) counts as zero
+    if usage is None:
+        return 0, 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+class LLMUsageTracker:
+    """
+    Records every model call and workflow run. Each record goes to the process metrics,
+    to the structured "llm.usage" log and to a rolling window summarized per template.
+    """
+
+    def __init__(self, window_seconds: int = LLM_USAGE_WINDOW_SECONDS, max_records: int = LLM_USAGE_MAX_RECORDS):
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.calls: Deque[LLMCallRecord] = deque(maxlen=max_records)
+        self.runs: Deque[LLMRunRecord] = deque(maxlen=max_records)
+
+    def record_call(self, template_name: str, role: str, model_name: str, usage: Any, seconds: float,
+                    verified: Optional[bool] = None) -> None:
+        prompt_tokens, completion_tokens = _usage_tokens(usage)
+        record = LLMCallRecord(time.time(), template_name, role, model_name, prompt_tokens, completion_tokens,
+                               seconds, verified)
+        with self.lock:
+            self.calls.append(record)
+
+        metrics.inc(f"llm.{role}.calls")
+        metrics.inc("llm.prompt_tokens", prompt_tokens)
+        metrics.inc("llm.completion_tokens", completion_tokens)
+        metrics.observe(f"llm.{role}", seconds)
+        if verified is not None:
+            metrics.inc("llm.verifier.passed" if verified else "llm.verifier.rejected")
+        logger.info(json.dumps({"event": "llm_call", **asdict(record)}))
+
+    def record_run(self, template_name: str, attempts: int, success: bool, cached: bool, seconds: float) -> None:
+        record = LLMRunRecord(time.time(), template_name, attempts, success, cached, seconds)
+        with self.lock:
+            self.runs.append(record)
+
+        metrics.inc("llm.runs")
+        if cached:
+            metrics.inc("llm.runs.cached")
+        else:
+            metrics.inc("llm.attempts", attempts)
+            metrics.inc("llm.retries", max(0, attempts - 1))
+            if not success:
+                metrics.inc("llm.runs.unverified")
+        metrics.observe("llm.run", seconds)
+        logger.info(json.dumps({"event": "llm_run", **asdict(record)}))
+
+    def _template_summary(self) -> Dict[str, Any]:
+        return {
+            "runs": 0, "cached_runs": 0, "successful_runs": 0, "attempts": 0, "retries": 0, "run_seconds": 0.0,
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "call_seconds": 0.0,
+            "processor_seconds": 0.0, "verifier_seconds": 0.0, "verifications": 0, "verifications_passed": 0,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregates the records of the last window_seconds per template, most expensive templates first.
+        """
+        since = time.time() - self.window_seconds
+        with self.lock:
+            calls = [c for c in self.calls if c.timestamp >= since]
+            runs = [r for r in self.runs if r.timestamp >= since]
+
+        templates: Dict[str, Dict[str, Any]] = {}
+        for run in runs:
+            entry = templates.setdefault(run.template_name, self._template_summary())
+            entry["runs"] += 1
+            entry["run_seconds"] += run.seconds
+            if run.cached:
+                entry["cached_runs"] += 1
+                continue
+            entry["successful_runs"] += int(run.success)
+            entry["attempts"] += run.attempts
+            entry["retries"] += max(0, run.attempts - 1)
+        for call in calls:
+            entry = templates.setdefault(call.template_name, self._template_summary())
+            entry["calls"] += 1
+            entry["prompt_tokens"] += call.prompt_tokens
+            entry["completion_tokens"] += call.completion_tokens
+            entry["call_seconds"] += call.seconds
+            if call.role in ("processor", "verifier"):
+                entry[f"{call.role}_seconds"] += call.seconds
+            if call.verified is not None:
+                entry["verifications"] += 1
+                entry["verifications_passed"] += int(call.verified)
+
+        for entry in templates.values():
+            executed_runs = entry["runs"] - entry["cached_runs"]
+            entry["verifier_pass_rate"] = (entry["verifications_passed"] / entry["verifications"]
+                                           if entry["verifications"] else None)
+            entry["avg_attempts"] = entry["attempts"] / executed_runs if executed_runs else None
+            entry["avg_run_seconds"] = entry["run_seconds"] / entry["runs"] if entry["runs"] else None
+            entry["estimated_cost"] = estimate_cost(entry["prompt_tokens"], entry["completion_tokens"])
+
+        return {
+            "window_seconds": self.window_seconds,
+            "templates": dict(sorted(templates.items(),
+                                     key=lambda item: (item[1]["estimated_cost"], item[1]["call_seconds"]),
+                                     reverse=True)),
+        }
+
+llm_usage = LLMUsageTracker()
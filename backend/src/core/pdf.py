@@ -1,10 +1,122 @@
-from typing import List
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 import fitz  
 
+# Number of processes used for parallel page extraction, 0 disables the parallel mode
+PDF_EXTRACT_PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", "0"))
+
+# Documents shorter than this are not worth the process round trip
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+def page_text_with_markers(page_num: int, page: fitz.Page) -> List[str]:
+    """
+    Returns the marker and text lines of a single page, in reading order.
+    """
+    lines: List[str] = []
+
+    # Get text blocks. Each block is a tuple: (x0, y0, x1, y1, "text", block_no, block_type)
+    blocks = page.get_text("blocks")
+
+    # Sort blocks vertically then horizontally to ensure reading order
+    blocks.sort(key=lambda b: (b[1], b[0]))
+
+    for block in blocks:
+        # block[4] contains the text content
+        # block[6] is the block type (0 for text, 1 for image)
+        if block[6] == 0: 
+            y_coord = int(block[1]) # y0 coordinate
+            text_content = block[4].strip()
+
+            if text_content:
+                marker = f"!!{page_num},{y_coord}!!"
+                lines.append(marker)
+                lines.append(text_content)
+
+    return lines
+
+def extract_file_text_with_markers(pdf_path: str) -> str:
+    """
+    Blocking variant of PDFProcessor.extract_text_with_markers reading the PDF from disk.
+    Pages are loaded one at a time, so it is meant to be run in a worker thread.
+    """
+    full_text: List[str] = []
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        for page_num, page in enumerate(doc, start=1):
+            full_text.extend(page_text_with_markers(page_num, page))
+    return "\n".join(full_text)
+
+def pdf_page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return doc.page_count
+
+def extract_page_range_with_markers(pdf_path: str, start: int, stop: int) -> List[str]:
+    """
+    Returns the marker and text lines of pages [start, stop) (0-based).
+    Runs in a worker process which opens the document on its own.
+    """
+    lines: List[str] = []
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        for page_index in range(start, stop):
+            lines.extend(page_text_with_markers(page_index + 1, doc[page_index]))
+    return lines
+
+def split_page_range(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits pages [0, page_count) into at most `parts` contiguous ranges of similar size.
+    """
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges: List[Tuple[int, int]] = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
 class PDFProcessor:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, processes: int = PDF_EXTRACT_PROCESSES) -> None:
+        self.processes = processes
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self.process_pool is None:
+            # spawn avoids forking a process that already runs an event loop and threads
+            self.process_pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+        return self.process_pool
+
+    def shutdown(self) -> None:
+        if self.process_pool is not None:
+            self.process_pool.shutdown(cancel_futures=True)
+            self.process_pool = None
+
+    async def extract_file_text_with_markers(self, pdf_path: str, executor: Optional[Executor] = None) -> str:
+        """
+        Extracts text with markers from a PDF on disk without blocking the event loop.
+
+        Blocking work runs in `executor` (default thread pool if None). When parallel mode is
+        enabled and the document is long enough, the page range is split across the process pool
+        and the per-page output is merged in page order, which gives exactly the serial result.
+        """
+        loop = asyncio.get_running_loop()
+        if self.processes <= 0:
+            return await loop.run_in_executor(executor, extract_file_text_with_markers, pdf_path)
+
+        page_count = await loop.run_in_executor(executor, pdf_page_count, pdf_path)
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            return await loop.run_in_executor(executor, extract_file_text_with_markers, pdf_path)
+
+        process_pool = self._get_process_pool()
+        parts = await asyncio.gather(*[
+            loop.run_in_executor(process_pool, extract_page_range_with_markers, pdf_path, start, stop)
+            for start, stop in split_page_range(page_count, self.processes)
+        ])
+        return "\n".join(line for part in parts for line in part)
 
     async def extract_text_with_markers(self, pdf_bytes: bytes) -> str:
         """
@@ -17,23 +129,7 @@ class PDFProcessor:
         full_text: List[str] = []
 
         for page_num, page in enumerate(doc, start=1):
-            # Get text blocks. Each block is a tuple: (x0, y0, x1, y1, "text", block_no, block_type)
-            blocks = page.get_text("blocks")
-            
-            # Sort blocks vertically then horizontally to ensure reading order
-            blocks.sort(key=lambda b: (b[1], b[0]))
-
-            for block in blocks:
-                # block[4] contains the text content
-                # block[6] is the block type (0 for text, 1 for image)
-                if block[6] == 0: 
-                    y_coord = int(block[1]) # y0 coordinate
-                    text_content = block[4].strip()
-                    
-                    if text_content:
-                        marker = f"!!{page_num},{y_coord}!!"
-                        full_text.append(marker)
-                        full_text.append(text_content)
+            full_text.extend(page_text_with_markers(page_num, page))
 
         return "\n".join(full_text)
     
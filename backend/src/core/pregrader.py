@@ -0,0 +1,135 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional
+
+from schemas.questions import GradeResult
+
+# Ordered token overlap at or above which an answer is accepted as correct without the LLM
+GRADING_FUZZY_ACCEPT = float(os.getenv("GRADING_FUZZY_ACCEPT", "0.9"))
+
+# Ordered token overlap below which an answer is rejected as incorrect without the LLM, 0 disables local rejection
+GRADING_FUZZY_REJECT = float(os.getenv("GRADING_FUZZY_REJECT", "0"))
+
+# Overlap is only trusted for answers of at least this many tokens, shorter ones are escalated
+GRADING_FUZZY_MIN_TOKENS = int(os.getenv("GRADING_FUZZY_MIN_TOKENS", "3"))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_CONTRACTED_NOT_RE = re.compile(r"n['’]t\b")
+_PLAIN_NUMBER_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+_GROUPED_NUMBER_RE = re.compile(r"^-?\d{1,3}(?:,\d{3})+(?:\.\d+)?$")
+_DECIMAL_COMMA_RE = re.compile(r"^-?\d+,\d+$")
+_NUMERIC_RE = re.compile(r"^-?[\d.,]+$")
+
+# Words which carry no meaning for the comparison; connectives and negations do, so they are kept
+_STOPWORDS = frozenset({
+    "a", "an", "the", "of", "to", "in", "on", "at", "is", "are", "was", "were", "be", "it", "its",
+    "this", "that", "by", "for", "with", "as",
+})
+
+# An answer whose negations differ from the reference one may mean the opposite, however similar it is
+_NEGATIONS = frozenset({"not", "no", "never", "none", "nor", "nothing", "neither", "cannot"})
+
+def normalize_answer(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _CONTRACTED_NOT_RE.sub(" not", text)
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def answer_tokens(normalized: str) -> List[str]:
+    # In answer order, "man bites dog" is not "dog bites man"
+    return [token for token in normalized.split(" ") if token and token not in _STOPWORDS]
+
+def token_overlap(user_tokens: Iterable[str], correct_tokens: Iterable[str]) -> float:
+    user_tokens, correct_tokens = set(user_tokens), set(correct_tokens)
+    if not user_tokens or not correct_tokens:
+        return 0.0
+    return 2 * len(user_tokens & correct_tokens) / (len(user_tokens) + len(correct_tokens))
+
+def sequence_overlap(user_tokens: List[str], correct_tokens: List[str]) -> float:
+    # Like token_overlap, but only tokens matched in the same order count
+    if not user_tokens or not correct_tokens:
+        return 0.0
+    return SequenceMatcher(None, user_tokens, correct_tokens, autojunk=False).ratio()
+
+def _negations(tokens: List[str]) -> Counter:
+    return Counter(token for token in tokens if token in _NEGATIONS)
+
+def _parse_number(text: str) -> Optional[float]:
+    """
+    Parses 1000, 1000.5, 1,000,000, 1,000.5 and the decimal comma 3,5. A single group like 1,000
+    may be a thousand or 1.000 written with a decimal comma, so it is left to the LLM.
+    """
+    text = text.strip()
+    if _PLAIN_NUMBER_RE.match(text):
+        return float(text)
+    if _GROUPED_NUMBER_RE.match(text):
+        if text.count(",") == 1 and "." not in text:
+            return None
+        return float(text.replace(",", ""))
+    if _DECIMAL_COMMA_RE.match(text):
+        return float(text.replace(",", "."))
+    return None
+
+def _result(question_id: int, verdict: str, feedback: str) -> GradeResult:
+    # Verdict, score, pass and needs_retry follow the rules of prompt_templates/prompt1.agent2
+    score = {"correct": 1.0, "incorrect": 0.0, "blank": 0.0}.get(verdict)
+    return GradeResult(
+        question_id=question_id,
+        verdict=verdict,
+        score=score,
+        passed=verdict == "correct" if score is not None else None,
+        needs_retry=verdict in ("incorrect", "blank"),
+        feedback=feedback,
+        graded_by="rules",
+    )
+
+def pregrade(question_id: int, user_answer: Optional[str], correct_answer: Optional[str]) -> Optional[GradeResult]:
+    """
+    Grades the cases which need no judgement: blank answers, exact matches after normalization,
+    unambiguous numeric answers and answers whose token overlap clears the configured thresholds.
+    Returns None when the answer is ambiguous (including any difference in negations) and has
+    to be graded by the LLM.
+    """
+    if not correct_answer or not correct_answer.strip():
+        return _result(question_id, "cannot_grade", "This question has no reference answer to grade against.")
+    if not user_answer or not user_answer.strip():
+        return _result(question_id, "blank", "No answer was given. Please try answering the question.")
+
+    # Normalization drops the separators, it would make 1,000 and 1.000 equal
+    if _NUMERIC_RE.match(user_answer.strip()) or _NUMERIC_RE.match(correct_answer.strip()):
+        user_number = _parse_number(user_answer)
+        correct_number = _parse_number(correct_answer)
+        if user_number is not None and correct_number is not None:
+            if user_number == correct_number:
+                return _result(question_id, "correct", "Correct.")
+            return _result(question_id, "incorrect", "The value is not correct, please check your calculation.")
+        if user_answer.strip() == correct_answer.strip():
+            return _result(question_id, "correct", "Correct.")
+        return None
+
+    user_normalized = normalize_answer(user_answer)
+    correct_normalized = normalize_answer(correct_answer)
+    if user_normalized == correct_normalized:
+        return _result(question_id, "correct", "Correct.")
+
+    user_tokens = answer_tokens(user_normalized)
+    correct_tokens = answer_tokens(correct_normalized)
+    if user_tokens and user_tokens == correct_tokens:
+        return _result(question_id, "correct", "Correct.")
+    if _negations(user_tokens) != _negations(correct_tokens):
+        return None
+    if min(len(user_tokens), len(correct_tokens)) < GRADING_FUZZY_MIN_TOKENS:
+        return None
+
+    overlap = sequence_overlap(user_tokens, correct_tokens)
+    if overlap >= GRADING_FUZZY_ACCEPT:
+        return _result(question_id, "correct", "Correct, your answer matches the expected one.")
+    if overlap < GRADING_FUZZY_REJECT:
+        return _result(question_id, "incorrect", "Your answer does not address the question, please try again.")
+    return None
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from util.exceptions import InvalidPromptException
+
+logger = logging.getLogger("llm.prompt_templates")
+
+PROMPT_TEMPLATE_PATH = os.path.join(Path(__file__).parent.parent.absolute(), "prompt_templates")
+
+# Re-read changed template files on access, meant for development only
+PROMPT_TEMPLATES_RELOAD = os.getenv("PROMPT_TEMPLATES_RELOAD", "false").lower() == "true"
+
+# {name} is a placeholder, {{ and }} are escaped braces. Any other brace (e.g. the JSON
+# examples in the prompts) is literal text, unlike with str.format.
+_TOKEN_RE = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    template_name: str
+    agent_suffix: str
+    # Alternating literal text and placeholder names, starting with literal text
+    segments: Tuple[str, ...]
+    placeholders: FrozenSet[str]
+    content_hash: str
+
+    @staticmethod
+    def compile(template_name: str, agent_suffix: str, content: str) -> "PromptTemplate":
+        segments: List[str] = []
+        literal: List[str] = []
+        position = 0
+        for match in _TOKEN_RE.finditer(content):
+            literal.append(content[position:match.start()])
+            if match.group(1) is None:
+                literal.append(match.group(0)[0])
+            else:
+                segments.append("".join(literal))
+                segments.append(match.group(1))
+                literal = []
+            position = match.end()
+        literal.append(content[position:])
+        segments.append("".join(literal))
+        return PromptTemplate(
+            template_name=template_name,
+            agent_suffix=agent_suffix,
+            segments=tuple(segments),
+            placeholders=frozenset(segments[1::2]),
+            content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        )
+
+    def render(self, context: Dict[str, Any]) -> str:
+        missing = self.placeholders - context.keys()
+        if missing:
+            raise InvalidPromptException(
+                f"Missing context argument for template {self.template_name}.{self.agent_suffix}: {', '.join(sorted(missing))}")
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            parts[i] = str(context[parts[i]])
+        return "".join(parts)
+
+class PromptTemplateRegistry:
+    """
+    Loads and compiles every file of the prompt template directory once.
+    Files are named <template_name>.<agent_suffix>, e.g. prompt1.agent1.
+    """
+
+    def __init__(self, template_dir: str = PROMPT_TEMPLATE_PATH, reload: bool = PROMPT_TEMPLATES_RELOAD):
+        self.template_dir = Path(template_dir)
+        self.reload = reload
+        self.templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        self.mtimes: Dict[str, int] = {}
+        self.load()
+
+    def _scan(self) -> Dict[str, int]:
+        return {entry.path: entry.stat().st_mtime_ns for entry in os.scandir(self.template_dir)
+                if entry.is_file() and "." in entry.name}
+
+    def load(self) -> None:
+        templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        mtimes = self._scan()
+        for path in mtimes:
+            template_name, agent_suffix = Path(path).name.rsplit(".", 1)
+            try:
+                content = Path(path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                raise RuntimeError(f"Error loading template {path}: {e}")
+            templates[(template_name, agent_suffix)] = PromptTemplate.compile(template_name, agent_suffix, content)
+        self.templates = templates
+        self.mtimes = mtimes
+
+    def _reload_if_changed(self) -> None:
+        if self.reload and self._scan() != self.mtimes:
+            logger.info(f"Prompt templates changed, reloading {self.template_dir}")
+            self.load()
+
+    def get(self, template_name: str, agent_suffix: str) -> PromptTemplate:
+        self._reload_if_changed()
+        template = self.templates.get((template_name, agent_suffix))
+        if template is None:
+            raise InvalidPromptException(f"Template file not found: {template_name}.{agent_suffix}")
+        return template
+
+    def render(self, template_name: str, agent_suffix: str, context: Dict[str, Any]) -> str:
+        return self.get(template_name, agent_suffix).render(context)
+
+    def check_arguments(self, template_name: str, agent_suffixes: Tuple[str, ...], arguments: Dict[str, Any]) -> None:
+        """
+        Fails with InvalidPromptException if a template is missing or an argument it needs is not provided.
+        """
+        for agent_suffix in agent_suffixes:
+            template = self.get(template_name, agent_suffix)
+            missing = template.placeholders - arguments.keys()
+            if missing:
+                raise InvalidPromptException(
+                    f"Missing context argument for template {template_name}.{agent_suffix}: {', '.join(sorted(missing))}")
+
+    def template_hash(self, template_name: str, agent_suffixes: Tuple[str, ...]) -> str:
+        digest = hashlib.sha256()
+        for agent_suffix in agent_suffixes:
+            digest.update(self.get(template_name, agent_suffix).content_hash.encode())
+        return digest.hexdigest()
+
+prompt_templates = PromptTemplateRegistry()
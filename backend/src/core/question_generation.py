@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+from fastapi import Depends, HTTPException, status
+from pydantic import ValidationError
+
+from core.chunking import chunk_document_text, get_token_counter
+from core.database import release_db_connection
+from core.llm import AgentWorkflowEngine, get_agent_workflow_engine
+from data_access.documents import DocumentDatabase, get_document_db
+from data_access.questions import QuestionDatabase, get_question_db
+from models.document import DOCUMENT_STATUS_READY
+from schemas.questions import GeneratedTopic, QuestionGenerateResult, QuestionRead
+
+logger = logging.getLogger("llm.question_generation")
+
+# Template pair used for each chunk, see prompt_templates/generate_questions.*
+GENERATION_TEMPLATE = "generate_questions"
+
+# Maximum number of chunks generated concurrently by one request
+GENERATION_CONCURRENCY = int(os.getenv("QUESTION_GENERATION_CONCURRENCY", "4"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+def merge_topics(chunk_topics: List[List[GeneratedTopic]]) -> List[GeneratedTopic]:
+    """
+    Merges topics of all chunks in document order. Topics with the same title (which happens
+    for sections split across chunks) are combined and repeated questions (from the chunk
+    overlap) are dropped.
+    """
+    merged: Dict[str, GeneratedTopic] = {}
+    seen_questions = set()
+    for topics in chunk_topics:
+        for topic in topics:
+            key = _normalize(topic.title)
+            target = merged.setdefault(key, GeneratedTopic(title=topic.title.strip(), questions=[]))
+            for question in topic.questions:
+                question_key = _normalize(question.question)
+                if question_key in seen_questions:
+                    continue
+                seen_questions.add(question_key)
+                target.questions.append(question)
+    return [topic for topic in merged.values() if topic.questions]
+
+class QuestionGenerationManager:
+    def __init__(self, document_db: DocumentDatabase, question_db: QuestionDatabase, engine: AgentWorkflowEngine):
+        self.document_db = document_db
+        self.question_db = question_db
+        self.engine = engine
+
+    async def _generate_chunk(self, chunk: str, semaphore: asyncio.Semaphore) -> Optional[List[GeneratedTopic]]:
+        async with semaphore:
+            result = await self.engine.run_flow(GENERATION_TEMPLATE, {"input_text": chunk})
+        if not result["success"]:
+            logger.warning(f"Question generation of a chunk was not verified after {result['attempts_made']} attempts: "
+                           f"{result['stop_reason']}")
+            return None
+        try:
+            return [GeneratedTopic.model_validate(topic) for topic in json.loads(result["final_processor_output"])]
+        except (ValueError, TypeError, ValidationError) as e:
+            logger.warning(f"Unparsable question generation output: {e}")
+            return None
+
+    async def generate_questions(self, document_id: int, save: bool = True) -> QuestionGenerateResult:
+        document = await self.document_db.get(document_id, with_text=True)
+        if not document:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+        if document.status != DOCUMENT_STATUS_READY:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document text is not extracted yet")
+
+        chunks = chunk_document_text(document.text_data, get_token_counter(self.engine.model_name))
+        # Generation takes minutes, do not hold a pooled connection meanwhile
+        await release_db_connection(self.document_db.session)
+
+        semaphore = asyncio.Semaphore(GENERATION_CONCURRENCY)
+        results = await asyncio.gather(*[self._generate_chunk(chunk, semaphore) for chunk in chunks],
+                                       return_exceptions=True)
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error(f"Question generation of chunk {index + 1}/{len(chunks)} of document {document_id} failed",
+                             exc_info=result)
+        chunk_topics = [r for r in results if isinstance(r, list)]
+        topics = merge_topics(chunk_topics)
+
+        saved_questions: List[QuestionRead] = []
+        if save:
+            for topic in topics:
+                for generated in topic.questions:
+                    # Questions the text cannot answer have no correct answer to grade against
+                    if not generated.answer:
+                        continue
+                    question = await self.question_db.create({
+                        "question": generated.question,
+                        "correct_answer": generated.answer,
+                        "context": generated.source_text or "",
+                        "document_id": document_id,
+                    })
+                    saved_questions.append(QuestionRead.model_validate(question))
+            await self.question_db.commit()
+
+        return QuestionGenerateResult(
+            document_id=document_id,
+            chunks=len(chunks),
+            failed_chunks=len(chunks) - len(chunk_topics),
+            topics=topics,
+            saved_questions=saved_questions,
+        )
+
+async def get_question_generation_manager(document_db: DocumentDatabase = Depends(get_document_db),
+                                          question_db: QuestionDatabase = Depends(get_question_db),
+                                          engine: AgentWorkflowEngine = Depends(get_agent_workflow_engine)):
+    yield QuestionGenerationManager(document_db, question_db, engine)
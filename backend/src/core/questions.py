@@ -1,12 +1,15 @@
-from typing import List
+from typing import Optional
 from fastapi import Depends, HTTPException, status
+from schemas.pagination import CursorPage
 from data_access.questions import QuestionDatabase, get_question_db
+from data_access.learner_mastery import LearnerMasteryDatabase, get_learner_mastery_db
 from schemas.questions import QuestionRead, QuestionCreate
 from models.question import Question
 
 class QuestionManager:
-    def __init__(self, question_db: QuestionDatabase):
+    def __init__(self, question_db: QuestionDatabase, learner_mastery_db: LearnerMasteryDatabase):
         self.question_db = question_db
+        self.learner_mastery_db = learner_mastery_db
 
     async def get_question(self, question_id: int) -> Question:
         question = await self.question_db.get(question_id)
@@ -14,20 +17,27 @@ class QuestionManager:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
         return question
 
-    async def list_questions(self, limit: int = 100, offset: int = 0) -> List[QuestionRead]:
-        questions = await self.question_db.list_questions(limit, offset)
-        return [QuestionRead.model_validate(q) for q in questions]
+    async def list_questions(self, limit: int = 100, cursor: Optional[str] = None) -> CursorPage[QuestionRead]:
+        questions, next_cursor = await self.question_db.list_questions(limit, cursor)
+        return CursorPage[QuestionRead](content=[QuestionRead.model_validate(q) for q in questions], next_cursor=next_cursor)
 
     async def create_question(self, question_data: QuestionCreate) -> QuestionRead:
         create_dict = question_data.model_dump()
         question = await self.question_db.create(create_dict)
+        await self.question_db.commit()
         return QuestionRead.model_validate(question)
 
     async def delete_question(self, question_id: int) -> None:
-        question = await self.question_db.get(question_id)
+        question = await self.question_db.get(question_id, with_text=False)
         if not question:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+        document_id = question.document_id
+        learner_keys = await self.learner_mastery_db.get_question_learners(question_id)
         await self.question_db.delete(question)
+        # The progress rows stay, but no longer count towards the document's summaries
+        await self.learner_mastery_db.refresh_pairs((learner_key, document_id) for learner_key in learner_keys)
+        await self.question_db.commit()
 
-async def get_question_manager(question_db: QuestionDatabase = Depends(get_question_db)):
-    yield QuestionManager(question_db)
+async def get_question_manager(question_db: QuestionDatabase = Depends(get_question_db),
+                               learner_mastery_db: LearnerMasteryDatabase = Depends(get_learner_mastery_db)):
+    yield QuestionManager(question_db, learner_mastery_db)
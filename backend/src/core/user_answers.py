@@ -1,5 +1,8 @@
-from typing import List
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
+from schemas.pagination import CursorPage
 from data_access.user_answers import UserAnswerDatabase, get_user_answer_db
 from schemas.user_answers import UserAnswerRead, UserAnswerCreate
 from models.user_answer import UserAnswer
@@ -14,13 +17,23 @@ class UserAnswerManager:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User answer not found")
         return user_answer
 
-    async def list_user_answers(self, limit: int = 100, offset: int = 0) -> List[UserAnswerRead]:
-        user_answers = await self.user_answer_db.list_answers(limit, offset)
-        return [UserAnswerRead.model_validate(ans) for ans in user_answers]
+    async def list_user_answers(self, limit: int = 100, cursor: Optional[str] = None) -> CursorPage[UserAnswerRead]:
+        user_answers, next_cursor = await self.user_answer_db.list_answers(limit, cursor)
+        return CursorPage[UserAnswerRead](content=[UserAnswerRead.model_validate(ans) for ans in user_answers], next_cursor=next_cursor)
+
+    async def list_learner_answers(self, learner_key: UUID, question_id: Optional[int] = None,
+                                   answered_from: Optional[datetime] = None, answered_to: Optional[datetime] = None,
+                                   limit: int = 100, cursor: Optional[str] = None) -> CursorPage[UserAnswerRead]:
+        if answered_from is not None and answered_to is not None and answered_from >= answered_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="answered_from must be before answered_to")
+        user_answers, next_cursor = await self.user_answer_db.list_learner_answers(
+            learner_key, question_id, answered_from, answered_to, limit, cursor)
+        return CursorPage[UserAnswerRead](content=[UserAnswerRead.model_validate(ans) for ans in user_answers], next_cursor=next_cursor)
 
     async def create_user_answer(self, user_answer_create: UserAnswerCreate) -> UserAnswerRead:
         create_dict = user_answer_create.model_dump()
         user_answer = await self.user_answer_db.create(create_dict)
+        await self.user_answer_db.commit()
         return UserAnswerRead.model_validate(user_answer)
 
     async def delete_user_answer(self, user_answer_id: int) -> None:
@@ -28,6 +41,7 @@ class UserAnswerManager:
         if not user_answer:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User answer not found")
         await self.user_answer_db.delete(user_answer)
+        await self.user_answer_db.commit()
 
 async def get_user_answer_manager(user_answer_db: UserAnswerDatabase = Depends(get_user_answer_db)):
     yield UserAnswerManager(user_answer_db)
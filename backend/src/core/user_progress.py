@@ -1,12 +1,72 @@
-from typing import List
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
+from schemas.pagination import CursorPage
 from data_access.user_progress import UserProgressDatabase, get_user_progress_db
-from schemas.user_progress import UserProgressRead, UserProgressCreate
-from models.user_progress import UserProgress
+from data_access.learner_mastery import LearnerMasteryDatabase, SUMMARY_COLUMNS, get_learner_mastery_db
+from schemas.user_progress import (UserProgressRead, UserProgressCreate, AnswerResult, LearnerMasteryRead,
+                                   LearnerDocumentMasteryRead, DocumentMasteryRead)
+from models.user_progress import UserProgress, ReviewSchedule
+
+# Score (0-100) from which an answered question counts as known
+MASTERY_SCORE = int(os.getenv("PROGRESS_MASTERY_SCORE", "80"))
+
+# Spaced-repetition delays, see ReviewSchedule
+REVIEW_SCHEDULE = ReviewSchedule(
+    learning_hours=float(os.getenv("REVIEW_LEARNING_HOURS", "24")),
+    known_hours=float(os.getenv("REVIEW_KNOWN_HOURS", "48")),
+    max_doublings=int(os.getenv("REVIEW_MAX_DOUBLINGS", "6")),
+)
+
+def merge_results(results: List[AnswerResult], now: datetime) -> List[Dict[str, Any]]:
+    """
+    Combines the results of the same learner and question (a single upsert statement
+    may touch every row only once): attempts are counted, the best score is kept and
+    the last score is the one of the latest answer.
+    """
+    merged: Dict[Tuple[UUID, int], Dict[str, Any]] = {}
+    for result in results:
+        answered_at = result.answered_at or now
+        key = (result.learner_key, result.question_id)
+        row = merged.get(key)
+        if row is None:
+            merged[key] = {
+                "learner_key": result.learner_key,
+                "question_id": result.question_id,
+                "attempts": 1,
+                "best_score": result.score,
+                "last_score": result.score,
+                "last_answer_at": answered_at,
+            }
+            continue
+        row["attempts"] += 1
+        row["best_score"] = max(row["best_score"], result.score)
+        if answered_at >= row["last_answer_at"]:
+            row["last_score"] = result.score
+            row["last_answer_at"] = answered_at
+    return list(merged.values())
+
+def mastery_summary(counts: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turns summed learner_document_mastery counts into the MasterySummary fields.
+    """
+    summary = {column: counts[column] for column in SUMMARY_COLUMNS if column != "best_score_sum"}
+    answered = counts["answered_count"]
+    summary["average_best_score"] = counts["best_score_sum"] / answered if answered else 0
+    summary["mastery_percent"] = 100 * counts["known_count"] / answered if answered else 0
+    return summary
 
 class UserProgressManager:
-    def __init__(self, user_progress_db: UserProgressDatabase):
+    """
+    Every change of user_progress also refreshes the learner_document_mastery summaries
+    of the touched (learner, document) pairs, in the same transaction.
+    """
+
+    def __init__(self, user_progress_db: UserProgressDatabase, learner_mastery_db: LearnerMasteryDatabase):
         self.user_progress_db = user_progress_db
+        self.learner_mastery_db = learner_mastery_db
 
     async def get_user_progress(self, user_progress_id: int) -> UserProgress:
         user_progress = await self.user_progress_db.get(user_progress_id)
@@ -14,20 +74,76 @@ class UserProgressManager:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User progress not found")
         return user_progress
 
-    async def list_user_progress(self, limit: int = 100, offset: int = 0) -> List[UserProgressRead]:
-        user_progress_list = await self.user_progress_db.list_user_progress(limit, offset)
+    async def list_user_progress(self, limit: int = 100, cursor: Optional[str] = None) -> CursorPage[UserProgressRead]:
+        user_progress_list, next_cursor = await self.user_progress_db.list_user_progress(limit, cursor)
+        return CursorPage[UserProgressRead](content=[UserProgressRead.model_validate(up) for up in user_progress_list], next_cursor=next_cursor)
+
+    async def list_learner_progress(self, learner_key: UUID, progress_status: Optional[str] = None,
+                                    question_id: Optional[int] = None, limit: int = 100,
+                                    cursor: Optional[str] = None) -> CursorPage[UserProgressRead]:
+        user_progress_list, next_cursor = await self.user_progress_db.list_learner_progress(
+            learner_key, progress_status, question_id, limit, cursor)
+        return CursorPage[UserProgressRead](content=[UserProgressRead.model_validate(up) for up in user_progress_list], next_cursor=next_cursor)
+
+    async def get_review_queue(self, learner_key: UUID, limit: int = 20,
+                               include_upcoming: bool = False) -> List[UserProgressRead]:
+        """
+        Returns the questions the learner should review next, most overdue first. Overdue rank
+        combines status, gap and staleness: needs_review questions are due right after the answer,
+        low-scored ones soon after, well-known ones only after exponentially growing delays.
+        """
+        due_before = None if include_upcoming else datetime.now(timezone.utc)
+        user_progress_list = await self.user_progress_db.review_queue(learner_key, limit, due_before)
         return [UserProgressRead.model_validate(up) for up in user_progress_list]
 
     async def create_user_progress(self, user_progress_create: UserProgressCreate) -> UserProgressRead:
         create_dict = user_progress_create.model_dump()
-        user_progress = await self.user_progress_db.create(create_dict)
+        user_progress = await self.user_progress_db.create(create_dict, REVIEW_SCHEDULE)
+        await self.learner_mastery_db.refresh([(user_progress.learner_key, user_progress.question_id)])
+        await self.user_progress_db.commit()
         return UserProgressRead.model_validate(user_progress)
 
+    async def apply_results(self, results: List[AnswerResult]) -> List[UserProgressRead]:
+        """
+        Applies graded answers, e.g. of a whole quiz submission, to the learners' progress in one round trip.
+        """
+        rows = merge_results(results, datetime.now(timezone.utc))
+        user_progress_list = await self.user_progress_db.apply_results(rows, MASTERY_SCORE, REVIEW_SCHEDULE)
+        await self.learner_mastery_db.refresh([(row["learner_key"], row["question_id"]) for row in rows])
+        await self.user_progress_db.commit()
+        return [UserProgressRead.model_validate(up) for up in user_progress_list]
+
+    async def apply_result(self, result: AnswerResult) -> UserProgressRead:
+        return (await self.apply_results([result]))[0]
+
     async def delete_user_progress(self, user_progress_id: int) -> None:
         user_progress = await self.user_progress_db.get(user_progress_id)
         if not user_progress:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User progress not found")
         await self.user_progress_db.delete(user_progress)
+        await self.learner_mastery_db.refresh([(user_progress.learner_key, user_progress.question_id)])
+        await self.user_progress_db.commit()
+
+    async def get_learner_mastery(self, learner_key: UUID) -> LearnerMasteryRead:
+        documents = await self.learner_mastery_db.get_learner(learner_key)
+        totals = {column: sum(getattr(document, column) for document in documents) for column in SUMMARY_COLUMNS}
+        return LearnerMasteryRead(
+            learner_key=learner_key,
+            documents=[
+                LearnerDocumentMasteryRead(
+                    document_id=document.document_id,
+                    updated_at=document.updated_at,
+                    **mastery_summary({column: getattr(document, column) for column in SUMMARY_COLUMNS}),
+                )
+                for document in documents
+            ],
+            **mastery_summary(totals),
+        )
+
+    async def get_document_mastery(self, document_id: int) -> DocumentMasteryRead:
+        counts = await self.learner_mastery_db.get_document(document_id)
+        return DocumentMasteryRead(document_id=document_id, learners_count=counts["learners_count"], **mastery_summary(counts))
 
-async def get_user_progress_manager(user_progress_db: UserProgressDatabase = Depends(get_user_progress_db)):
-    yield UserProgressManager(user_progress_db)
+async def get_user_progress_manager(user_progress_db: UserProgressDatabase = Depends(get_user_progress_db),
+                                    learner_mastery_db: LearnerMasteryDatabase = Depends(get_learner_mastery_db)):
+    yield UserProgressManager(user_progress_db, learner_mastery_db)
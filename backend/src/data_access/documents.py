@@ -1,24 +1,67 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, desc
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select, update, func, or_, and_, literal, Text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from fastapi import Depends
 
 from core.database import get_db
-from models.document import Document
+from util.pagination import keyset_paginate, next_page
+from models.document import Document, DOCUMENT_STATUS_READY, DOCUMENT_STATUS_INGESTING
+
+# Scalar columns loaded by metadata-only queries, text_data is fetched only when asked for
+DOCUMENT_METADATA_COLUMNS = (
+    Document.document_id,
+    Document.name,
+    Document.description,
+    Document.content_type,
+    Document.blob_key,
+    Document.size,
+    Document.content_hash,
+    Document.status,
+    Document.rec_date,
+)
+
+# Keyset pagination order, newest first
+PAGE_COLUMNS = (Document.rec_date, Document.document_id)
 
 class DocumentDatabase:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get(self, document_id: int) -> Optional[Document]:
+    async def get(self, document_id: int, with_text: bool = False) -> Optional[Document]:
         statement = select(Document).where(Document.document_id == document_id)
+        if not with_text:
+            statement = statement.options(load_only(*DOCUMENT_METADATA_COLUMNS))
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
-    async def list_documents(self, limit: int = 100, offset: int = 0) -> List[Document]:
-        statement = select(Document).order_by(desc(Document.rec_date)).offset(offset).limit(limit)
+    async def get_by_content_hash(self, content_hash: str, stale_seconds: float) -> Optional[Document]:
+        """
+        Returns a document with the same content whose text can be reused: a ready one, or one
+        still being extracted. Failed ingestions and ingestions older than stale_seconds (their
+        replica most likely stopped mid-extraction) are not reused, so the upload extracts again.
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=stale_seconds)
+        statement = (
+            select(Document)
+            .where(Document.content_hash == content_hash)
+            .where(or_(
+                Document.status == DOCUMENT_STATUS_READY,
+                and_(Document.status == DOCUMENT_STATUS_INGESTING, Document.rec_date >= stale_before),
+            ))
+            # Ready rows first
+            .order_by(Document.status != DOCUMENT_STATUS_READY, Document.document_id)
+            .limit(1)
+        )
         result = await self.session.execute(statement)
-        return result.scalars().all()
+        return result.scalar_one_or_none()
+
+    async def list_documents(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Document], Optional[str]]:
+        statement = select(Document).options(load_only(*DOCUMENT_METADATA_COLUMNS))
+        statement = keyset_paginate(statement, PAGE_COLUMNS, cursor, limit)
+        result = await self.session.execute(statement)
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
 
     async def create(self, create_dict: Dict[str, Any]) -> Document:
         # Ensure ID and rec_date are not set manually if passed, relying on DB defaults
@@ -31,6 +74,41 @@ class DocumentDatabase:
         await self.session.refresh(document)
         return document
 
+    async def update_text_data(self, content_hash: str, text_data: str, status: str) -> None:
+        # All rows of the same content waiting for the extraction share its result
+        statement = (
+            update(Document)
+            .where(Document.content_hash == content_hash)
+            .where(Document.status == DOCUMENT_STATUS_INGESTING)
+            .values(text_data=text_data, status=status)
+        )
+        await self.session.execute(statement)
+        await self.session.flush()
+
+    async def list_ingesting_blobs(self) -> List[Tuple[str, str]]:
+        # (content_hash, blob_key) of every content still waiting for its extraction
+        statement = (
+            select(Document.content_hash, Document.blob_key)
+            .where(Document.status == DOCUMENT_STATUS_INGESTING)
+            .distinct()
+        )
+        result = await self.session.execute(statement)
+        return [(content_hash, blob_key) for content_hash, blob_key in result.all()]
+
+    async def lock_blob(self, blob_key: str) -> None:
+        # Held until the end of the transaction, serializes deduplicating uploads with the
+        # deletion of the blob they would share
+        await self.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(literal(blob_key, Text)))))
+
+    async def count_by_blob_key(self, blob_key: str) -> int:
+        statement = select(func.count()).select_from(Document).where(Document.blob_key == blob_key)
+        result = await self.session.execute(statement)
+        return result.scalar_one()
+
+    async def commit(self) -> None:
+        # Makes freshly created rows visible to background workers using their own sessions
+        await self.session.commit()
+
     async def delete(self, document: Document) -> None:
         await self.session.delete(document)
         await self.session.flush()
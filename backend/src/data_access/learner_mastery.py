@@ -0,0 +1,137 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select, delete, func, tuple_, literal, text, Text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from fastapi import Depends
+
+from core.database import get_db
+from models.learner_mastery import LearnerDocumentMastery
+from models.question import Question
+from models.user_progress import (UserProgress, PROGRESS_STATUS_NEW, PROGRESS_STATUS_LEARNING,
+                                  PROGRESS_STATUS_KNOWN, PROGRESS_STATUS_NEEDS_REVIEW)
+
+SUMMARY_COLUMNS = ("answered_count", "new_count", "learning_count", "known_count", "needs_review_count", "best_score_sum")
+
+def mastery_statement() -> Select:
+    """
+    Aggregates user_progress joined to questions into learner_document_mastery rows.
+    Rows without attempts (created as "new") are counted in new_count only.
+    """
+    answered = UserProgress.attempts_count > 0
+    return (
+        select(
+            UserProgress.learner_key,
+            Question.document_id,
+            func.count().filter(answered).label("answered_count"),
+            func.count().filter(UserProgress.status == PROGRESS_STATUS_NEW).label("new_count"),
+            func.count().filter(answered, UserProgress.status == PROGRESS_STATUS_LEARNING).label("learning_count"),
+            func.count().filter(answered, UserProgress.status == PROGRESS_STATUS_KNOWN).label("known_count"),
+            func.count().filter(answered, UserProgress.status == PROGRESS_STATUS_NEEDS_REVIEW).label("needs_review_count"),
+            func.coalesce(func.sum(UserProgress.best_score).filter(answered), 0).label("best_score_sum"),
+        )
+        .join(Question, Question.question_id == UserProgress.question_id)
+        .group_by(UserProgress.learner_key, Question.document_id)
+    )
+
+class LearnerMasteryDatabase:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _store(self, statement: Select) -> int:
+        insert_statement = insert(LearnerDocumentMastery).from_select(
+            ["learner_key", "document_id", *SUMMARY_COLUMNS], statement)
+        # Two transactions refreshing a summary which did not exist yet may both insert it
+        insert_statement = insert_statement.on_conflict_do_update(
+            index_elements=[LearnerDocumentMastery.learner_key, LearnerDocumentMastery.document_id],
+            set_={**{column: insert_statement.excluded[column] for column in SUMMARY_COLUMNS}, "updated_at": func.now()},
+        )
+        result = await self.session.execute(insert_statement)
+        return result.rowcount
+
+    async def refresh(self, progress_keys: Iterable[Tuple[UUID, Optional[int]]]) -> None:
+        """
+        Recomputes the summaries of the (learner, document) pairs touched by the given
+        (learner_key, question_id) progress rows. Only the rows of those pairs are read,
+        through the questions document index and the (learner_key, question_id) unique index.
+        """
+        progress_keys = [(learner_key, question_id) for learner_key, question_id in progress_keys if question_id is not None]
+        if not progress_keys:
+            return
+        result = await self.session.execute(
+            select(Question.question_id, Question.document_id)
+            .where(Question.question_id.in_({question_id for _, question_id in progress_keys}))
+        )
+        documents = dict(result.all())
+        await self.refresh_pairs(
+            (learner_key, documents[question_id]) for learner_key, question_id in progress_keys if question_id in documents
+        )
+
+    async def refresh_pairs(self, pairs: Iterable[Tuple[UUID, int]]) -> None:
+        """
+        Recomputes the summaries of the given (learner_key, document_id) pairs. Progress rows
+        whose question no longer exists are left out by the join of mastery_statement().
+        """
+        # Sorted, so concurrent refreshes lock the summary rows in the same order
+        pairs: List[Tuple[UUID, int]] = sorted(set(pairs))
+        if not pairs:
+            return
+
+        # Without the lock, two transactions creating the same summary would both aggregate
+        # a snapshot missing the other's progress rows, and the later upsert would keep a stale
+        # row. Locked in sorted order, the second one waits and aggregates after the first committed.
+        for learner_key, document_id in pairs:
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(literal(str(learner_key), Text)), document_id)))
+
+        # Deleting first drops the summaries whose last progress row is gone
+        await self.session.execute(
+            delete(LearnerDocumentMastery)
+            .where(tuple_(LearnerDocumentMastery.learner_key, LearnerDocumentMastery.document_id).in_(pairs))
+        )
+        await self._store(mastery_statement().where(tuple_(UserProgress.learner_key, Question.document_id).in_(pairs)))
+
+    async def get_question_learners(self, question_id: int) -> List[UUID]:
+        result = await self.session.execute(
+            select(UserProgress.learner_key).where(UserProgress.question_id == question_id).distinct())
+        return list(result.scalars().all())
+
+    async def rebuild(self, learner_key: Optional[UUID] = None) -> int:
+        """
+        Recomputes all summaries, or those of one learner, from user_progress. Used for backfills
+        and after questions were moved between documents.
+        """
+        # Refreshes wait until the rebuild commits, dashboards keep reading meanwhile
+        await self.session.execute(text("LOCK TABLE public.learner_document_mastery IN EXCLUSIVE MODE"))
+        statement = delete(LearnerDocumentMastery)
+        aggregate = mastery_statement()
+        if learner_key is not None:
+            statement = statement.where(LearnerDocumentMastery.learner_key == learner_key)
+            aggregate = aggregate.where(UserProgress.learner_key == learner_key)
+        await self.session.execute(statement)
+        return await self._store(aggregate)
+
+    async def get_learner(self, learner_key: UUID) -> List[LearnerDocumentMastery]:
+        statement = (
+            select(LearnerDocumentMastery)
+            .where(LearnerDocumentMastery.learner_key == learner_key)
+            .order_by(LearnerDocumentMastery.document_id)
+        )
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
+    async def get_document(self, document_id: int) -> Dict[str, Any]:
+        # Adds up the summaries of all learners of the document, one row per learner
+        statement = (
+            select(
+                func.count().label("learners_count"),
+                *[func.coalesce(func.sum(getattr(LearnerDocumentMastery, column)), 0).label(column) for column in SUMMARY_COLUMNS],
+            )
+            .where(LearnerDocumentMastery.document_id == document_id)
+        )
+        result = await self.session.execute(statement)
+        return dict(result.one()._mapping)
+
+async def get_learner_mastery_db(session: AsyncSession = Depends(get_db)):
+    yield LearnerMasteryDatabase(session)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.llm_cache import LLMCacheEntry
+
+class LLMCacheDatabase:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        statement = (
+            select(LLMCacheEntry.result)
+            .where(LLMCacheEntry.cache_key == cache_key)
+            .where(LLMCacheEntry.expires_at > func.now())
+        )
+        result = await self.session.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def put(self, cache_key: str, template_name: str, result: Dict[str, Any], expires_at: datetime) -> None:
+        statement = insert(LLMCacheEntry).values(
+            cache_key=cache_key,
+            template_name=template_name,
+            result=result,
+            expires_at=expires_at,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.cache_key],
+            set_={"result": statement.excluded.result, "expires_at": statement.excluded.expires_at,
+                  "created_at": func.now()},
+        )
+        await self.session.execute(statement)
+
+    async def delete_expired(self) -> None:
+        await self.session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= func.now()))
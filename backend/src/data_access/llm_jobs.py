@@ -0,0 +1,137 @@
+from datetime import timedelta
+from typing import Optional, Dict, Any
+from uuid import UUID
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends
+
+from core.database import get_db
+
+from models.llm_job import (LLMJob, LLM_JOB_STATUS_QUEUED, LLM_JOB_STATUS_RUNNING, LLM_JOB_STATUS_COMPLETED,
+                            LLM_JOB_STATUS_FAILED, LLM_JOB_STATUS_CANCELLED)
+
+class LLMJobDatabase:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, job_id: UUID) -> Optional[LLMJob]:
+        return await self.session.get(LLMJob, job_id)
+
+    async def create(self, job_data: Dict[str, Any]) -> LLMJob:
+        job = LLMJob(**job_data)
+        self.session.add(job)
+        await self.session.flush()
+        await self.session.refresh(job)
+        return job
+
+    async def count_queued(self) -> int:
+        statement = select(func.count()).select_from(LLMJob).where(LLMJob.status == LLM_JOB_STATUS_QUEUED)
+        result = await self.session.execute(statement)
+        return result.scalar_one()
+
+    async def claim(self, worker_id: str, lease_seconds: int) -> Optional[LLMJob]:
+        """
+        Atomically takes the oldest runnable job: a queued job which is due, or a running job
+        whose worker lost its lease. SKIP LOCKED lets concurrent workers claim different rows.
+        """
+        candidate = (
+            select(LLMJob.job_id)
+            .where(or_(
+                and_(LLMJob.status == LLM_JOB_STATUS_QUEUED, LLMJob.run_after <= func.now()),
+                and_(LLMJob.status == LLM_JOB_STATUS_RUNNING, LLMJob.locked_until < func.now()),
+            ))
+            .order_by(LLMJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(LLMJob)
+            .where(LLMJob.job_id == candidate)
+            .values(
+                status=LLM_JOB_STATUS_RUNNING,
+                attempts=LLMJob.attempts + 1,
+                locked_by=worker_id,
+                locked_until=func.now() + timedelta(seconds=lease_seconds),
+                updated_at=func.now(),
+            )
+            .returning(LLMJob)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def extend_lease(self, job_id: UUID, worker_id: str, lease_seconds: int) -> Optional[bool]:
+        """
+        Renews the lease of a running job and returns whether cancellation was requested,
+        or None when the job is no longer held by this worker.
+        """
+        statement = (
+            update(LLMJob)
+            .where(LLMJob.job_id == job_id, LLMJob.locked_by == worker_id, LLMJob.status == LLM_JOB_STATUS_RUNNING)
+            .values(locked_until=func.now() + timedelta(seconds=lease_seconds), updated_at=func.now())
+            .returning(LLMJob.cancel_requested)
+        )
+        result = await self.session.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def _finish(self, job_id: UUID, worker_id: str, values: Dict[str, Any]) -> None:
+        # Guarded by the lease holder, a job reclaimed by another worker is left alone
+        statement = (
+            update(LLMJob)
+            .where(LLMJob.job_id == job_id, LLMJob.locked_by == worker_id, LLMJob.status == LLM_JOB_STATUS_RUNNING)
+            .values(locked_by=None, locked_until=None, updated_at=func.now(), **values)
+        )
+        await self.session.execute(statement)
+
+    async def complete(self, job_id: UUID, worker_id: str, result: Dict[str, Any]) -> None:
+        await self._finish(job_id, worker_id, {"status": LLM_JOB_STATUS_COMPLETED, "result": result,
+                                               "error": None, "finished_at": func.now()})
+
+    async def fail(self, job_id: UUID, worker_id: str, error: str) -> None:
+        await self._finish(job_id, worker_id, {"status": LLM_JOB_STATUS_FAILED, "error": error,
+                                               "finished_at": func.now()})
+
+    async def mark_cancelled(self, job_id: UUID, worker_id: str) -> None:
+        await self._finish(job_id, worker_id, {"status": LLM_JOB_STATUS_CANCELLED, "finished_at": func.now()})
+
+    async def retry(self, job_id: UUID, worker_id: str, error: str, delay_seconds: float) -> None:
+        await self._finish(job_id, worker_id, {"status": LLM_JOB_STATUS_QUEUED, "error": error,
+                                               "run_after": func.now() + timedelta(seconds=delay_seconds)})
+
+    async def requeue(self, job_id: UUID, worker_id: str) -> None:
+        # The interrupted run does not count as an attempt
+        await self._finish(job_id, worker_id, {"status": LLM_JOB_STATUS_QUEUED, "attempts": LLMJob.attempts - 1,
+                                               "run_after": func.now()})
+
+    async def cancel(self, job_id: UUID) -> Optional[str]:
+        """
+        Cancels a queued job right away and flags a running one for its worker.
+        Returns the resulting status, or None when the job has already finished.
+        """
+        queued = (
+            update(LLMJob)
+            .where(LLMJob.job_id == job_id, LLMJob.status == LLM_JOB_STATUS_QUEUED)
+            .values(status=LLM_JOB_STATUS_CANCELLED, cancel_requested=True, finished_at=func.now(), updated_at=func.now())
+            .returning(LLMJob.status)
+        )
+        result = await self.session.execute(queued)
+        job_status = result.scalar_one_or_none()
+        if job_status is not None:
+            return job_status
+
+        running = (
+            update(LLMJob)
+            .where(LLMJob.job_id == job_id, LLMJob.status == LLM_JOB_STATUS_RUNNING)
+            .values(cancel_requested=True, updated_at=func.now())
+            .returning(LLMJob.status)
+        )
+        result = await self.session.execute(running)
+        return result.scalar_one_or_none()
+
+    async def commit(self) -> None:
+        # Makes a submitted job visible to the workers before the response is sent
+        await self.session.commit()
+
+async def get_llm_job_db(session: AsyncSession = Depends(get_db)):
+    yield LLMJobDatabase(session)
@@ -1,24 +1,42 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, desc
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from fastapi import Depends
 
 from core.database import get_db
+from util.pagination import keyset_paginate, next_page
 from models.question import Question
 
+# Keyset pagination order, newest first
+PAGE_COLUMNS = (Question.created_at, Question.question_id)
+
 class QuestionDatabase:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get(self, question_id: int) -> Optional[Question]:
+    async def get(self, question_id: int, with_text: bool = True) -> Optional[Question]:
         statement = select(Question).where(Question.question_id == question_id)
+        if not with_text:
+            # Existence checks do not need the (potentially long) question, answer and context texts
+            statement = statement.options(load_only(Question.question_id, Question.document_id, Question.created_at))
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
-    async def list_questions(self, limit: int = 100, offset: int = 0) -> List[Question]:
-        statement = select(Question).order_by(desc(Question.created_at)).offset(offset).limit(limit)
+    async def get_many(self, question_ids: List[int]) -> Dict[int, Question]:
+        # One round trip for a whole quiz, only the texts needed for grading are loaded
+        statement = (
+            select(Question)
+            .where(Question.question_id.in_(set(question_ids)))
+            .options(load_only(Question.question_id, Question.question, Question.correct_answer))
+        )
+        result = await self.session.execute(statement)
+        return {question.question_id: question for question in result.scalars().all()}
+
+    async def list_questions(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Question], Optional[str]]:
+        statement = keyset_paginate(select(Question), PAGE_COLUMNS, cursor, limit)
         result = await self.session.execute(statement)
-        return result.scalars().all()
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
 
     async def create(self, create_dict: Dict[str, Any]) -> Question:
         # Ensure created_at is not set manually if passed, relying on DB defaults
@@ -31,6 +49,10 @@ class QuestionDatabase:
         await self.session.refresh(question)
         return question
 
+    async def commit(self) -> None:
+        # Writes are committed before the response is sent, get_db's teardown runs only after it
+        await self.session.commit()
+
     async def delete(self, question: Question) -> None:
         await self.session.delete(question)
         await self.session.flush()
@@ -1,11 +1,18 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, desc
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from uuid import UUID
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from fastapi import Depends
 
 from core.database import get_db
+from util.pagination import keyset_paginate, next_page
 from models.user_answer import UserAnswer
 
+# Keyset pagination order, newest first
+PAGE_COLUMNS = (UserAnswer.answered_at, UserAnswer.user_answer_id)
+
 class UserAnswerDatabase:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -15,10 +22,31 @@ class UserAnswerDatabase:
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
-    async def list_answers(self, limit: int = 100, offset: int = 0) -> List[UserAnswer]:
-        statement = select(UserAnswer).order_by(desc(UserAnswer.answered_at)).offset(offset).limit(limit)
+    async def list_answers(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[UserAnswer], Optional[str]]:
+        statement = keyset_paginate(select(UserAnswer), PAGE_COLUMNS, cursor, limit)
+        result = await self.session.execute(statement)
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
+
+    @staticmethod
+    def learner_answers_statement(learner_key: UUID, question_id: Optional[int] = None,
+                                  answered_from: Optional[datetime] = None, answered_to: Optional[datetime] = None,
+                                  limit: int = 100, cursor: Optional[str] = None) -> Select:
+        # Served by user_answers_learner_time_id_idx, or user_answers_learner_q_time_idx with a question
+        statement = select(UserAnswer).where(UserAnswer.learner_key == learner_key)
+        if question_id is not None:
+            statement = statement.where(UserAnswer.question_id == question_id)
+        if answered_from is not None:
+            statement = statement.where(UserAnswer.answered_at >= answered_from)
+        if answered_to is not None:
+            statement = statement.where(UserAnswer.answered_at < answered_to)
+        return keyset_paginate(statement, PAGE_COLUMNS, cursor, limit)
+
+    async def list_learner_answers(self, learner_key: UUID, question_id: Optional[int] = None,
+                                   answered_from: Optional[datetime] = None, answered_to: Optional[datetime] = None,
+                                   limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[UserAnswer], Optional[str]]:
+        statement = self.learner_answers_statement(learner_key, question_id, answered_from, answered_to, limit, cursor)
         result = await self.session.execute(statement)
-        return result.scalars().all()
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
 
     async def create(self, create_dict: Dict[str, Any]) -> UserAnswer:
         # Ensure ID and answered_at are not set manually if passed, relying on DB defaults
@@ -31,6 +59,21 @@ class UserAnswerDatabase:
         await self.session.refresh(user_answer)
         return user_answer
 
+    async def create_many(self, rows: List[Dict[str, Any]]) -> List[UserAnswer]:
+        """
+        Stores a whole quiz submission with one batched INSERT (insertmanyvalues). The returned
+        rows are in the order of `rows`, which RETURNING of a plain multi-row INSERT does not guarantee.
+        """
+        if not rows:
+            return []
+        statement = insert(UserAnswer).returning(UserAnswer, sort_by_parameter_order=True)
+        result = await self.session.execute(statement, rows)
+        return list(result.scalars().all())
+
+    async def commit(self) -> None:
+        # Writes are committed before the response is sent, get_db's teardown runs only after it
+        await self.session.commit()
+
     async def delete(self, user_answer: UserAnswer) -> None:
         await self.session.delete(user_answer)
         await self.session.flush()
@@ -1,10 +1,39 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, desc
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from uuid import UUID
+from sqlalchemy import select, update, func, case, literal, literal_column, DateTime
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from fastapi import Depends
 
 from core.database import get_db
-from models.user_progress import UserProgress
+from util.pagination import keyset_paginate, next_page
+from models.user_progress import (UserProgress, ReviewSchedule, PROGRESS_STATUS_KNOWN, PROGRESS_STATUS_NEEDS_REVIEW,
+                                  PROGRESS_STATUS_LEARNING, progress_status)
+
+# Keyset pagination order, newest first
+PAGE_COLUMNS = (UserProgress.updated_at, UserProgress.user_progress_id)
+
+def review_due_expression(schedule: ReviewSchedule, status, last_score, attempts_count, last_answer_at):
+    """
+    SQL expression of review_due_at, shared by the insert and the update branch of the progress upsert.
+    """
+    hours = case(
+        (status == PROGRESS_STATUS_NEEDS_REVIEW, 0.0),
+        (status == PROGRESS_STATUS_KNOWN,
+         schedule.known_hours * func.power(2, func.least(attempts_count - 1, schedule.max_doublings))),
+        else_=schedule.learning_hours * last_score / 100.0,
+    )
+    return last_answer_at + literal_column("interval '1 hour'") * hours
+
+def stored_review_due_expression(schedule: ReviewSchedule):
+    """
+    review_due_at computed from the stored columns of a row. Rows never answered are due
+    from their creation on.
+    """
+    return review_due_expression(schedule, UserProgress.status, UserProgress.last_score, UserProgress.attempts_count,
+                                 func.coalesce(UserProgress.last_answer_at, UserProgress.created_at))
 
 class UserProgressDatabase:
     def __init__(self, session: AsyncSession):
@@ -15,31 +44,136 @@ class UserProgressDatabase:
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
 
-    async def list_user_progress(self, limit: int = 100, offset: int = 0) -> List[UserProgress]:
-        statement = select(UserProgress).order_by(desc(UserProgress.updated_at)).offset(offset).limit(limit)
+    async def list_user_progress(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[UserProgress], Optional[str]]:
+        statement = keyset_paginate(select(UserProgress), PAGE_COLUMNS, cursor, limit)
+        result = await self.session.execute(statement)
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
+
+    @staticmethod
+    def learner_progress_statement(learner_key: UUID, status: Optional[str] = None, question_id: Optional[int] = None,
+                                   limit: int = 100, cursor: Optional[str] = None) -> Select:
+        # Served by user_progress_learner_updated_idx, or the (learner_key, question_id) unique index with a question
+        statement = select(UserProgress).where(UserProgress.learner_key == learner_key)
+        if status is not None:
+            statement = statement.where(UserProgress.status == status)
+        if question_id is not None:
+            statement = statement.where(UserProgress.question_id == question_id)
+        return keyset_paginate(statement, PAGE_COLUMNS, cursor, limit)
+
+    async def list_learner_progress(self, learner_key: UUID, status: Optional[str] = None,
+                                    question_id: Optional[int] = None, limit: int = 100,
+                                    cursor: Optional[str] = None) -> Tuple[List[UserProgress], Optional[str]]:
+        statement = self.learner_progress_statement(learner_key, status, question_id, limit, cursor)
         result = await self.session.execute(statement)
-        return result.scalars().all()
+        return next_page(result.scalars().all(), PAGE_COLUMNS, limit)
+
+    @staticmethod
+    def review_queue_statement(learner_key: UUID, limit: int, due_before: Optional[datetime] = None) -> Select:
+        # A range scan of user_progress_review_idx that stops after `limit` rows, however many the learner has
+        statement = (
+            select(UserProgress)
+            .where(UserProgress.learner_key == learner_key)
+            .where(UserProgress.review_due_at.is_not(None))
+        )
+        if due_before is not None:
+            statement = statement.where(UserProgress.review_due_at <= due_before)
+        return statement.order_by(UserProgress.review_due_at, UserProgress.user_progress_id).limit(limit)
+
+    async def review_queue(self, learner_key: UUID, limit: int, due_before: Optional[datetime] = None) -> List[UserProgress]:
+        result = await self.session.execute(self.review_queue_statement(learner_key, limit, due_before))
+        return list(result.scalars().all())
 
-    async def create(self, create_dict: Dict[str, Any]) -> UserProgress:
+    async def create(self, create_dict: Dict[str, Any], schedule: ReviewSchedule) -> UserProgress:
         # Ensure ID and timestamps are not set manually if passed, relying on DB defaults
         create_dict.pop("user_progress_id", None)
         create_dict.pop("created_at", None)
         create_dict.pop("updated_at", None)
         
+        create_dict.pop("review_due_at", None)
+
         user_progress = UserProgress(**create_dict)
         self.session.add(user_progress)
         await self.session.flush()
+        # Like the upsert of apply_results, every written row gets its review due date
+        await self.session.execute(
+            update(UserProgress)
+            .where(UserProgress.user_progress_id == user_progress.user_progress_id)
+            .values(review_due_at=stored_review_due_expression(schedule))
+        )
         await self.session.refresh(user_progress)
         return user_progress
 
-    async def update(self, user_progress: UserProgress, update_dict: Dict[str, Any]) -> UserProgress:
+    async def update(self, user_progress: UserProgress, update_dict: Dict[str, Any],
+                     schedule: ReviewSchedule) -> UserProgress:
         for key, value in update_dict.items():
             setattr(user_progress, key, value)
-        
+        user_progress.review_due_at = stored_review_due_expression(schedule)
+
         await self.session.flush()
         await self.session.refresh(user_progress)
         return user_progress
 
+    async def apply_results(self, rows: List[Dict[str, Any]], mastery_score: int,
+                            schedule: ReviewSchedule) -> List[UserProgress]:
+        """
+        Folds answer results into the progress rows in one INSERT ... ON CONFLICT DO UPDATE.
+        Each row carries learner_key, question_id, attempts (number of answers), best_score,
+        last_score and last_answer_at; a (learner_key, question_id) pair may occur only once.
+        The new aggregates are computed from the stored row by Postgres, so concurrent
+        submissions never overwrite each other.
+        """
+        if not rows:
+            return []
+        values = []
+        for row in rows:
+            row_status = progress_status(row["best_score"], row["last_score"], mastery_score)
+            values.append({
+                "learner_key": row["learner_key"],
+                "question_id": row["question_id"],
+                "attempts_count": row["attempts"],
+                "best_score": row["best_score"],
+                "last_score": row["last_score"],
+                "gap_to_mastery": 100 - row["last_score"],
+                "status": row_status,
+                "last_answer_at": row["last_answer_at"],
+                "review_due_at": review_due_expression(
+                    schedule, literal(row_status), literal(row["last_score"]), literal(row["attempts"]),
+                    literal(row["last_answer_at"], DateTime(timezone=True))),
+            })
+        statement = insert(UserProgress).values(values)
+        excluded = statement.excluded
+
+        # An older answer arriving late still counts as an attempt but does not replace the last score
+        is_newer = excluded.last_answer_at >= func.coalesce(UserProgress.last_answer_at, excluded.last_answer_at)
+        best_score = func.greatest(UserProgress.best_score, excluded.best_score)
+        last_score = case((is_newer, excluded.last_score), else_=UserProgress.last_score)
+        attempts_count = UserProgress.attempts_count + excluded.attempts_count
+        status = case(
+            (last_score >= mastery_score, PROGRESS_STATUS_KNOWN),
+            (best_score >= mastery_score, PROGRESS_STATUS_NEEDS_REVIEW),
+            else_=PROGRESS_STATUS_LEARNING,
+        )
+        last_answer_at = func.greatest(UserProgress.last_answer_at, excluded.last_answer_at)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserProgress.learner_key, UserProgress.question_id],
+            set_={
+                "attempts_count": attempts_count,
+                "best_score": best_score,
+                "last_score": last_score,
+                "gap_to_mastery": 100 - last_score,
+                "status": status,
+                "last_answer_at": last_answer_at,
+                "review_due_at": review_due_expression(schedule, status, last_score, attempts_count, last_answer_at),
+                "updated_at": func.now(),
+            },
+        ).returning(UserProgress).execution_options(populate_existing=True)
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
+    async def commit(self) -> None:
+        # Writes are committed before the response is sent, get_db's teardown runs only after it
+        await self.session.commit()
+
     async def delete(self, user_progress: UserProgress) -> None:
         await self.session.delete(user_progress)
         await self.session.flush()
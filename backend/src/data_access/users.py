@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict, Generic, Optional, Type, List
+from typing import Any, Dict, Generic, Optional, Type, List, Tuple
 from datetime import datetime
 
 from fastapi import Depends
@@ -17,6 +17,7 @@ from fastapi_users.authentication.strategy.db import (
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseOAuthAccountTable
 
 from core.database import get_db
+from util.pagination import keyset_paginate, next_page
 from models.user import AccessToken, OAuthAccount, User
 
 class TokenDatabase(Generic[AP], AccessTokenDatabase[AP]):
@@ -117,10 +118,10 @@ class UserDatabase(Generic[UP, ID], BaseUserDatabase[UP, ID]):
         await self.session.delete(user)
         await self.session.flush()
 
-    async def list_users(self, is_active : bool | None = True, 
-                         rec_date_start : datetime | None = None, rec_date_end : datetime | None = None, 
-                         text_filter : str = "", offset : int = 0, limit : int = 30) -> List[User]:
-        statement = select(self.user_table).order_by(self.user_table.id).limit(limit)
+    def _list_users_statement(self, is_active : bool | None = True,
+                              rec_date_start : datetime | None = None, rec_date_end : datetime | None = None,
+                              text_filter : str = "") -> Select:
+        statement = select(self.user_table)
         if is_active is not None:
             statement = statement.where(self.user_table.is_active == is_active)
         if rec_date_start is not None:
@@ -130,11 +131,29 @@ class UserDatabase(Generic[UP, ID], BaseUserDatabase[UP, ID]):
         if text_filter is not None and len(text_filter)>0:
             statement = statement.where(or_(self.user_table.email.ilike(f"%{text_filter}%"),
                                             self.user_table.full_name.ilike(f"%{text_filter}%")))
+        return statement
+
+    async def list_users(self, is_active : bool | None = True, 
+                         rec_date_start : datetime | None = None, rec_date_end : datetime | None = None, 
+                         text_filter : str = "", offset : int = 0, limit : int = 30) -> List[User]:
+        statement = self._list_users_statement(is_active, rec_date_start, rec_date_end, text_filter)
+        statement = statement.order_by(self.user_table.id).limit(limit)
         if offset > 0:
             statement = statement.offset(offset)
         query_results = await self.session.execute(statement)
         return [u[0] for u in query_results.unique()]
 
+    async def list_users_page(self, is_active : bool | None = True,
+                              rec_date_start : datetime | None = None, rec_date_end : datetime | None = None,
+                              text_filter : str = "", cursor : str | None = None,
+                              limit : int = 30) -> Tuple[List[User], Optional[str]]:
+        # Users are ordered by their (unique) id, so the id alone is the keyset
+        page_columns = (self.user_table.id,)
+        statement = self._list_users_statement(is_active, rec_date_start, rec_date_end, text_filter)
+        statement = keyset_paginate(statement, page_columns, cursor, limit, descending=False)
+        query_results = await self.session.execute(statement)
+        return next_page([u[0] for u in query_results.unique()], page_columns, limit)
+
 
     async def add_oauth_account(self, user: UP, create_dict: Dict[str, Any]) -> UP:
         if self.oauth_account_table is None:
@@ -1,14 +1,27 @@
+from contextlib import asynccontextmanager
 from typing import Annotated
 from fastapi import FastAPI, Cookie
 
 from util.logging import setup_logging
 
-from api import auth, users, llm, documents, questions, user_answers, user_progress
-from core.database import add_db_middleware
+from clients.openai import close_clients
+from core.database import engine
+from core.llm_jobs import llm_job_worker
+from core.ingestion import ingestion_pipeline
+from api import auth, users, llm, documents, questions, user_answers, user_progress, metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_job_worker.start()
+    await ingestion_pipeline.recover()
+    yield
+    await llm_job_worker.stop()
+    await ingestion_pipeline.shutdown()
+    await close_clients()
+    await engine.dispose()
 
 setup_logging()
-app = FastAPI()
-add_db_middleware(app)
+app = FastAPI(lifespan=lifespan)
 auth.include_routers(app)
 users.include_routers(app)
 llm.include_routers(app)
@@ -16,6 +29,7 @@ documents.include_routers(app)
 questions.include_routers(app)
 user_answers.include_routers(app)
 user_progress.include_routers(app)
+metrics.include_routers(app)
 
 @app.get("/api")
 async def root(ads_id: Annotated[str | None, Cookie()] = None):
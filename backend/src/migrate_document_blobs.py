@@ -0,0 +1,94 @@
+"""
+Migrates a database created before document content moved to the blob store: adds the
+blob_key, size, content_hash and status columns to documents, copies every row's `data`
+into the blob store and finally drops the `data` column. db-init/schema.sql only runs on
+a fresh database, so existing ones have to be migrated once with this command. It is
+idempotent, an interrupted run can simply be started again.
+
+Example (in the backend container, with BLOB_STORE_PATH mounted):
+  python migrate_document_blobs.py
+  python migrate_document_blobs.py --keep-data   # leaves the data column for a later run
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+from sqlalchemy import text
+
+from core.blobs import blob_store
+from core.database import engine
+
+SCHEMA_CHANGES = [
+    "ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS blob_key text",
+    "ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS size bigint NOT NULL DEFAULT 0",
+    "ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS content_hash text",
+    "ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS status text NOT NULL DEFAULT 'ready'",
+    "ALTER TABLE public.documents ALTER COLUMN text_data SET DEFAULT ''",
+    "CREATE INDEX IF NOT EXISTS documents_content_hash_idx ON public.documents(content_hash)",
+    "CREATE INDEX IF NOT EXISTS documents_rec_date_id_idx ON public.documents(rec_date DESC, document_id DESC)",
+]
+
+async def has_data_column(connection) -> bool:
+    result = await connection.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = 'documents' AND column_name = 'data'"
+    ))
+    return result.scalar_one_or_none() is not None
+
+def write_temp_file(data: bytes) -> str:
+    fd, path = tempfile.mkstemp(prefix="migrate-", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+async def main(keep_data: bool) -> int:
+    async with engine.begin() as connection:
+        for statement in SCHEMA_CHANGES:
+            await connection.execute(text(statement))
+        if not await has_data_column(connection):
+            print("Nothing to migrate, documents has no data column")
+            await engine.dispose()
+            return 0
+        # New uploads do not fill the old column any more
+        await connection.execute(text("ALTER TABLE public.documents ALTER COLUMN data DROP NOT NULL"))
+
+    moved = 0
+    while True:
+        # One document per transaction, content may be large
+        async with engine.begin() as connection:
+            row = (await connection.execute(text(
+                "SELECT document_id, data FROM public.documents "
+                "WHERE blob_key IS NULL ORDER BY document_id LIMIT 1 FOR UPDATE"
+            ))).one_or_none()
+            if row is None:
+                break
+            data = bytes(row.data or b"")
+            content_hash = hashlib.sha256(data).hexdigest()
+            path = await asyncio.to_thread(write_temp_file, data)
+            try:
+                await blob_store.put(content_hash, path)
+            finally:
+                os.remove(path)
+            await connection.execute(
+                text("UPDATE public.documents SET blob_key = :key, size = :size, "
+                     "content_hash = coalesce(content_hash, :key) WHERE document_id = :id"),
+                {"key": content_hash, "size": len(data), "id": row.document_id},
+            )
+            moved += 1
+    print(f"Moved the content of {moved} documents to the blob store")
+
+    async with engine.begin() as connection:
+        await connection.execute(text("ALTER TABLE public.documents ALTER COLUMN blob_key SET NOT NULL"))
+        if not keep_data:
+            await connection.execute(text("ALTER TABLE public.documents DROP COLUMN data"))
+            print("Dropped documents.data")
+    await engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-data", action="store_true", help="do not drop the documents.data column")
+    sys.exit(asyncio.run(main(parser.parse_args().keep_data)))
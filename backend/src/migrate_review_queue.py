@@ -0,0 +1,60 @@
+"""
+Migrates a database created before the spaced-repetition review queue: adds
+user_progress.review_due_at with its index and computes the due date of the existing
+rows with the current REVIEW_* schedule. db-init/schema.sql only runs on a fresh
+database, so existing ones have to be migrated once with this command. It is idempotent,
+an interrupted run can simply be started again.
+
+Example (in the backend container):
+  python migrate_review_queue.py
+  python migrate_review_queue.py --batch-size 5000
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import select, text, update
+
+from core.database import engine
+from core.user_progress import REVIEW_SCHEDULE
+from data_access.user_progress import stored_review_due_expression
+from models.user_progress import UserProgress
+
+SCHEMA_CHANGES = [
+    "ALTER TABLE public.user_progress ADD COLUMN IF NOT EXISTS review_due_at timestamptz",
+    "CREATE INDEX IF NOT EXISTS user_progress_review_idx "
+    "ON public.user_progress(learner_key, review_due_at, user_progress_id) WHERE review_due_at IS NOT NULL",
+]
+
+async def main(batch_size: int) -> int:
+    async with engine.begin() as connection:
+        for statement in SCHEMA_CHANGES:
+            await connection.execute(text(statement))
+
+    updated = 0
+    while True:
+        # Short transactions, so the backfill does not hold row locks of a whole table
+        async with engine.begin() as connection:
+            batch = (
+                select(UserProgress.user_progress_id)
+                .where(UserProgress.review_due_at.is_(None))
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await connection.execute(
+                update(UserProgress)
+                .where(UserProgress.user_progress_id.in_(batch))
+                .values(review_due_at=stored_review_due_expression(REVIEW_SCHEDULE))
+            )
+        if result.rowcount == 0:
+            break
+        updated += result.rowcount
+    print(f"Computed review_due_at of {updated} progress rows")
+    await engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    sys.exit(asyncio.run(main(parser.parse_args().batch_size)))
@@ -1,8 +1,13 @@
 from datetime import datetime
-from sqlalchemy import String, Text, LargeBinary, DateTime, func, Integer
+from typing import Optional
+from sqlalchemy import String, Text, BigInteger, DateTime, func, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 from core.database import Base
 
+DOCUMENT_STATUS_INGESTING = "ingesting"
+DOCUMENT_STATUS_READY = "ready"
+DOCUMENT_STATUS_FAILED = "failed"
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -10,6 +15,10 @@ class Document(Base):
     name: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=False, default="")
     content_type: Mapped[str] = mapped_column(String, nullable=False)
-    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
-    text_data: Mapped[str] = mapped_column(Text, nullable=False)
+    # Content lives in the blob store (core/blobs.py) under this key
+    blob_key: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    text_data: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, default=DOCUMENT_STATUS_READY)
     rec_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,30 @@
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import Integer, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from core.database import Base
+
+class LearnerDocumentMastery(Base):
+    """
+    Summary of a learner's user_progress rows for the questions of one document,
+    kept up to date by UserProgressManager and rebuilt by rebuild_mastery.py.
+    """
+    __tablename__ = "learner_document_mastery"
+
+    learner_key: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    document_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Questions with at least one attempt; the status counts below except new_count cover only those
+    answered_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    new_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    learning_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    known_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    needs_review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Sum rather than average, so the summaries of several documents or learners add up
+    best_score_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("learner_document_mastery_document_idx", "document_id"),
+    )
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any, Dict
+from sqlalchemy import String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from core.database import Base
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    template_name: Mapped[str] = mapped_column(String, nullable=False)
+    result: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
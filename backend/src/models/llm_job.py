@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+from sqlalchemy import Boolean, Integer, Float, String, Text, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from core.database import Base
+
+LLM_JOB_STATUS_QUEUED = "queued"
+LLM_JOB_STATUS_RUNNING = "running"
+LLM_JOB_STATUS_COMPLETED = "completed"
+LLM_JOB_STATUS_FAILED = "failed"
+LLM_JOB_STATUS_CANCELLED = "cancelled"
+
+LLM_JOB_FINISHED_STATUSES = (LLM_JOB_STATUS_COMPLETED, LLM_JOB_STATUS_FAILED, LLM_JOB_STATUS_CANCELLED)
+
+class LLMJob(Base):
+    __tablename__ = "llm_jobs"
+
+    job_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    template_name: Mapped[str] = mapped_column(String, nullable=False)
+    arguments: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    candidates: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    use_cache: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    max_retries: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    deadline_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    status: Mapped[str] = mapped_column(String, nullable=False, default=LLM_JOB_STATUS_QUEUED)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    result: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    # Lease of the worker currently running the job; an expired lease makes the job claimable again
+    locked_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("llm_jobs_queued_run_after_idx", "run_after", postgresql_where=text("status = 'queued'")),
+        Index("llm_jobs_running_locked_until_idx", "locked_until", postgresql_where=text("status = 'running'")),
+    )
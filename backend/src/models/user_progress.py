@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
@@ -6,6 +7,30 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from core.database import Base
 
+PROGRESS_STATUS_NEW = "new"
+PROGRESS_STATUS_LEARNING = "learning"
+PROGRESS_STATUS_KNOWN = "known"
+PROGRESS_STATUS_NEEDS_REVIEW = "needs_review"
+
+def progress_status(best_score: int, last_score: int, mastery_score: int) -> str:
+    # A learner who once mastered the question but answered worse since has to review it
+    if last_score >= mastery_score:
+        return PROGRESS_STATUS_KNOWN
+    if best_score >= mastery_score:
+        return PROGRESS_STATUS_NEEDS_REVIEW
+    return PROGRESS_STATUS_LEARNING
+
+@dataclass
+class ReviewSchedule:
+    """
+    Spaced-repetition delays after an answer: needs_review questions are due at once, learning
+    ones after learning_hours scaled by the last score, known ones after known_hours doubled
+    with every attempt (up to max_doublings times).
+    """
+    learning_hours: float
+    known_hours: float
+    max_doublings: int
+
 class UserProgress(Base):
     __tablename__ = "user_progress"
 
@@ -20,6 +45,8 @@ class UserProgress(Base):
     status: Mapped[str] = mapped_column(String, nullable=False, default='new')
     
     last_answer_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # When the question is next due for review, NULL until it was answered
+    review_due_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
@@ -0,0 +1,31 @@
+"""
+Rebuilds the learner_document_mastery summaries from user_progress, e.g. after the table was
+added to an existing database, after a bulk import of progress rows, or after questions were
+deleted or moved to another document.
+
+Example (in the backend container):
+  python rebuild_mastery.py
+  python rebuild_mastery.py --learner 0b6f3c1e-...
+"""
+import argparse
+import asyncio
+import sys
+from typing import Optional
+from uuid import UUID
+
+from core.database import async_session, engine
+from data_access.learner_mastery import LearnerMasteryDatabase
+
+async def main(learner_key: Optional[UUID]) -> int:
+    async with async_session() as session:
+        # One transaction: dashboards keep reading the old summaries until the rebuild commits
+        count = await LearnerMasteryDatabase(session).rebuild(learner_key)
+        await session.commit()
+    await engine.dispose()
+    print(f"Rebuilt {count} mastery summaries")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learner", type=UUID, help="rebuild only the summaries of this learner")
+    sys.exit(asyncio.run(main(parser.parse_args().learner)))
@@ -6,15 +6,24 @@ class DocumentList(BaseModel):
     name: str
     description: str
     content_type: str
+    size: int
+    status: str
     rec_date: datetime
 
+    class Config:
+        from_attributes = True
+
 class DocumentRead(BaseModel):
     document_id: int
     name: str
     description: str
     content_type: str
+    size: int
     text_data: str
+    status: str
     rec_date: datetime
+    # True when the upload matched an already stored document which was returned instead
+    is_duplicate: bool = False
 
     class Config:
         from_attributes = True
@@ -1,6 +1,44 @@
-from typing import Any, Dict
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
 
 class LLMRequest(BaseModel):
     template_name: str
     arguments: Dict[str, Any]
+    # Number of Processor candidates generated concurrently per attempt
+    candidates: int = Field(1, ge=1)
+    # Allows answering from the result cache when the same request already succeeded
+    use_cache: bool = True
+    # Lower the attempt budget and the wall-clock deadline configured for the template
+    max_retries: Optional[int] = Field(None, ge=1)
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+
+class LLMJobCreate(LLMRequest):
+    # Runs before the job is marked as failed, defaults to LLM_JOB_MAX_ATTEMPTS
+    max_attempts: Optional[int] = Field(None, ge=1, le=10)
+
+class LLMJobRead(BaseModel):
+    job_id: UUID
+    template_name: str
+    status: str
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    error: Optional[str] = None
+    run_after: datetime
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class LLMJobResult(BaseModel):
+    job_id: UUID
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
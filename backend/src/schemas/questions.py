@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
+from typing import List, Optional
 
 class QuestionCreate(BaseModel):
     question: str
@@ -18,3 +19,50 @@ class QuestionRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+class GeneratedQuestion(BaseModel):
+    difficulty: str = ""
+    question: str
+    answer: Optional[str] = None
+    source_text: Optional[str] = None
+
+class GeneratedTopic(BaseModel):
+    title: str
+    questions: List[GeneratedQuestion] = []
+
+class QuestionGenerateRequest(BaseModel):
+    document_id: int
+    # Store answerable generated questions in the questions table
+    save: bool = True
+
+class QuestionGenerateResult(BaseModel):
+    document_id: int
+    chunks: int
+    failed_chunks: int
+    topics: List[GeneratedTopic]
+    saved_questions: List[QuestionRead] = []
+
+class GradeItem(BaseModel):
+    question_id: int
+    user_answer: str
+
+class GradeRequest(BaseModel):
+    items: List[GradeItem] = Field(..., min_length=1, max_length=100)
+
+class GradeResult(BaseModel):
+    question_id: int
+    verdict: Optional[str] = None
+    score: Optional[float] = None
+    passed: Optional[bool] = Field(None, alias="pass")
+    needs_retry: Optional[bool] = None
+    feedback: Optional[str] = None
+    # "rules" when decided by the local pre-grader, "llm" otherwise
+    graded_by: str = "llm"
+    # Set instead of the grade when the item could not be graded
+    error: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+
+class GradeBatchResult(BaseModel):
+    results: List[GradeResult]
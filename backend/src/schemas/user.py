@@ -16,6 +16,7 @@ class UserRead(schemas.BaseUser[uuid.UUID]):
 class UserListPage(BaseModel):
     content : List[UserRead]
     is_more_data_available : bool
+    next_cursor : Optional[str] = None
 
 @dataclass
 class UserListFilter:
@@ -1,7 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
+
+from schemas.questions import GradeResult
+from schemas.user_progress import UserProgressRead
 
 class UserAnswerCreate(BaseModel):
     question_id: Optional[int] = None
@@ -17,3 +20,23 @@ class UserAnswerRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+class SubmittedAnswer(BaseModel):
+    question_id: int
+    user_answer: str
+    # Defaults to the time of the submission
+    answered_at: Optional[datetime] = None
+
+class AnswerSubmission(BaseModel):
+    learner_key: UUID
+    answers: List[SubmittedAnswer] = Field(..., min_length=1, max_length=100)
+
+class AnswerSubmissionItem(BaseModel):
+    # None when the answer was not stored (unknown question)
+    user_answer_id: Optional[int] = None
+    question_id: int
+    grade: GradeResult
+
+class AnswerSubmissionResult(BaseModel):
+    items: List[AnswerSubmissionItem]
+    progress: List[UserProgressRead]
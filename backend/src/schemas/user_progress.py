@@ -1,6 +1,6 @@
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, UUID4, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserProgressBase(BaseModel):
     learner_key: UUID4
@@ -17,8 +17,42 @@ class UserProgressCreate(UserProgressBase):
 
 class UserProgressRead(UserProgressBase):
     user_progress_id: int
+    review_due_at: Optional[datetime] = None
     updated_at: datetime
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+class AnswerResult(BaseModel):
+    learner_key: UUID4
+    question_id: int
+    # Grade of the answer scaled to 0-100
+    score: int = Field(..., ge=0, le=100)
+    # Defaults to the time the result is applied
+    answered_at: Optional[datetime] = None
+
+class AnswerResultBatch(BaseModel):
+    results: List[AnswerResult] = Field(..., min_length=1, max_length=500)
+
+class MasterySummary(BaseModel):
+    answered_count: int = 0
+    new_count: int = 0
+    learning_count: int = 0
+    known_count: int = 0
+    needs_review_count: int = 0
+    average_best_score: float = 0
+    # Share of the answered questions with status known, 0-100
+    mastery_percent: float = 0
+
+class LearnerDocumentMasteryRead(MasterySummary):
+    document_id: int
+    updated_at: datetime
+
+class LearnerMasteryRead(MasterySummary):
+    learner_key: UUID4
+    documents: List[LearnerDocumentMasteryRead]
+
+class DocumentMasteryRead(MasterySummary):
+    document_id: int
+    learners_count: int = 0
@@ -77,3 +77,7 @@ class WebhookSubscriptionNotFoundException(SAASException):
 class InvalidPromptException(SAASException):
     def __init__(self, detail: Any = None) -> None:
         super().__init__(400, detail)
+
+class InvalidCursorException(SAASException):
+    def __init__(self, detail: Any = None) -> None:
+        super().__init__(400, detail)
@@ -0,0 +1,43 @@
+import json
+import re
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+_BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range HTTP Range header into an inclusive (start, end) tuple.
+    Returns None when the whole content should be sent. Multi-range requests are
+    answered with the whole content, which RFC 9110 allows.
+    """
+    if not range_header:
+        return None
+    match = _BYTE_RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                                headers={"Content-Range": f"bytes */{size}"})
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = size - 1 if last == "" else min(int(last), size - 1)
+    if start >= size or start > end:
+        raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats one Server-Sent Events message with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
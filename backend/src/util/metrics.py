@@ -0,0 +1,69 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Any
+
+# Number of most recent observations kept per latency metric for percentiles
+LATENCY_WINDOW = 1000
+
+class LatencyStats:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def _percentile(self, ordered: list, q: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self._percentile(ordered, 0.50),
+            "p95": self._percentile(ordered, 0.95),
+            "p99": self._percentile(ordered, 0.99),
+        }
+
+class MetricsRegistry:
+    """
+    In-process metrics of a single backend replica: counters, latency summaries
+    and gauges which are computed when a snapshot is taken.
+    """
+
+    def __init__(self):
+        # Pool events fire from whatever thread checks out a connection
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.latencies: Dict[str, LatencyStats] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies.setdefault(name, LatencyStats()).observe(seconds)
+
+    def gauge(self, name: str, getter: Callable[[], float]) -> None:
+        self.gauges[name] = getter
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "latencies": {name: stats.snapshot() for name, stats in self.latencies.items()},
+                "gauges": {name: getter() for name, getter in self.gauges.items()},
+            }
+
+metrics = MetricsRegistry()
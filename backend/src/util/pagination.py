@@ -0,0 +1,94 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import desc, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+from sqlalchemy.types import TypeDecorator, Uuid
+
+from util.exceptions import InvalidCursorException
+
+T = TypeVar("T")
+
+# Upper bound of the page size accepted by the list endpoints
+MAX_PAGE_SIZE = 1000
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"u": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "t" in value:
+        return datetime.fromisoformat(value["t"])
+    if isinstance(value, dict) and "u" in value:
+        return uuid.UUID(value["u"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encodes the sort key values of the last returned row into an opaque token.
+    """
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _check_type(value: Any, column: Any) -> Any:
+    # Custom types (e.g. the GUID of fastapi-users) are checked against the type they bind as
+    column_type = column.type
+    if isinstance(column_type, TypeDecorator):
+        column_type = column_type.load_dialect_impl(postgresql.dialect())
+    if isinstance(column_type, Uuid):
+        if not isinstance(value, (str, uuid.UUID)):
+            raise ValueError("unexpected cursor value type")
+        return uuid.UUID(str(value))
+    try:
+        expected = column_type.python_type
+    except NotImplementedError:
+        return value
+    # bool is an int subclass, but never a valid sort key of an integer column
+    if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+        raise ValueError("unexpected cursor value type")
+    return value
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decodes a cursor of encode_cursor() and checks every value against the type of its column,
+    so that a crafted cursor is rejected with 400 instead of failing in the database driver.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("unexpected cursor shape")
+        return [_check_type(_decode_value(v), column) for v, column in zip(values, columns)]
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidCursorException("Invalid pagination cursor")
+
+def keyset_paginate(statement: Select, columns: Sequence[Any], cursor: Optional[str], limit: int,
+                    descending: bool = True) -> Select:
+    """
+    Orders the statement by `columns` (sort key first, unique id last) and seeks past the cursor,
+    so that every page costs a single index range scan no matter how deep it is.
+    One extra row is fetched to detect whether there is a next page, see next_page().
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        keys, seek = tuple_(*columns), tuple_(*values)
+        statement = statement.where(keys < seek if descending else keys > seek)
+    order_by = [desc(c) for c in columns] if descending else list(columns)
+    return statement.order_by(*order_by).limit(limit + 1)
+
+def next_page(rows: Sequence[T], columns: Sequence[Any], limit: int) -> Tuple[List[T], Optional[str]]:
+    """
+    Trims the extra row fetched by keyset_paginate() and returns the cursor of the next page (or None).
+    """
+    rows = list(rows)
+    if limit < 1 or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
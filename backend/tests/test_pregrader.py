@@ -0,0 +1,46 @@
+import pytest
+
+from core.pregrader import pregrade, answer_tokens, normalize_answer
+
+LONG_ANSWER = "the mitochondria produce most of the chemical energy needed to power the biochemical reactions of the cell"
+
+def verdict(user_answer, correct_answer):
+    result = pregrade(1, user_answer, correct_answer)
+    return None if result is None else result.verdict
+
+@pytest.mark.parametrize("user_answer, correct_answer, expected", [
+    ("", "Paris", "blank"),
+    ("Paris", "", "cannot_grade"),
+    ("  paris. ", "Paris", "correct"),
+    ("42", "42.0", "correct"),
+    ("3,5", "3.5", "correct"),
+    ("1,000,000", "1000000", "correct"),
+    ("1,000.5", "1000.5", "correct"),
+    ("41", "42", "incorrect"),
+])
+def test_decided_locally(user_answer, correct_answer, expected):
+    result = pregrade(1, user_answer, correct_answer)
+    assert result.verdict == expected
+    assert result.graded_by == "rules"
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    # A single thousands group may also be a decimal comma
+    ("1,000", "1000"),
+    ("1,000", "1.000"),
+    # Word order changes the meaning
+    ("man bites dog", "dog bites man"),
+    # Connectives are not stop words
+    ("true or false", "true and false"),
+    # Negations differ
+    (LONG_ANSWER.replace("produce", "do not produce"), LONG_ANSWER),
+    ("it isn't soluble in water at room temperature", "it is soluble in water at room temperature"),
+])
+def test_ambiguous_answers_go_to_the_llm(user_answer, correct_answer):
+    assert pregrade(1, user_answer, correct_answer) is None
+
+def test_near_match_is_accepted():
+    assert verdict(LONG_ANSWER + " itself", LONG_ANSWER) == "correct"
+
+def test_tokens_keep_order_and_connectives():
+    assert answer_tokens(normalize_answer("The dog and the man")) == ["dog", "and", "man"]
+    assert answer_tokens(normalize_answer("It doesn't")) == ["does", "not"]
@@ -8,6 +8,12 @@ CREATE TABLE IF NOT EXISTS public.questions (
   document_id     int4 not null
 );
 
+CREATE INDEX IF NOT EXISTS questions_created_id_idx
+  ON public.questions(created_at DESC, question_id DESC);
+
+CREATE INDEX IF NOT EXISTS questions_document_idx
+  ON public.questions(document_id);
+
 -- 2) HISTORIA ODPOWIEDZI (wiele prób)
 CREATE TABLE IF NOT EXISTS public.user_answers (
   user_answer_id    bigserial PRIMARY KEY,
@@ -26,7 +32,14 @@ CREATE INDEX IF NOT EXISTS user_answers_learner_idx
 CREATE INDEX IF NOT EXISTS user_answers_learner_q_time_idx
   ON public.user_answers(learner_key, question_id, answered_at DESC);
 
+CREATE INDEX IF NOT EXISTS user_answers_learner_time_id_idx
+  ON public.user_answers(learner_key, answered_at DESC, user_answer_id DESC);
+
+CREATE INDEX IF NOT EXISTS user_answers_time_id_idx
+  ON public.user_answers(answered_at DESC, user_answer_id DESC);
+
 -- 3) PROGRES (1 rekord na learner_key + question)
+-- Databases created before review_due_at existed are migrated with backend/src/migrate_review_queue.py
 CREATE TABLE IF NOT EXISTS public.user_progress (
   user_progress_id              bigserial PRIMARY KEY,
   learner_key     uuid NOT NULL,
@@ -40,6 +53,7 @@ CREATE TABLE IF NOT EXISTS public.user_progress (
                   CHECK (status IN ('new','learning','known','needs_review')),
 
   last_answer_at  timestamptz,
+  review_due_at   timestamptz,
   updated_at      timestamptz NOT NULL DEFAULT now(),
   created_at      timestamptz NOT NULL DEFAULT now(),
 
@@ -55,6 +69,16 @@ CREATE INDEX IF NOT EXISTS user_progress_question_idx
 CREATE INDEX IF NOT EXISTS user_progress_status_idx
   ON public.user_progress(status);
 
+CREATE INDEX IF NOT EXISTS user_progress_updated_id_idx
+  ON public.user_progress(updated_at DESC, user_progress_id DESC);
+
+CREATE INDEX IF NOT EXISTS user_progress_learner_updated_idx
+  ON public.user_progress(learner_key, updated_at DESC, user_progress_id DESC);
+
+CREATE INDEX IF NOT EXISTS user_progress_review_idx
+  ON public.user_progress(learner_key, review_due_at, user_progress_id)
+  WHERE review_due_at IS NOT NULL;
+
 -- 4) CHAT SESSIONS
 CREATE TABLE IF NOT EXISTS public.chat_sessions (
   id              uuid PRIMARY KEY,
@@ -89,13 +113,84 @@ CREATE INDEX IF NOT EXISTS chat_messages_question_idx
   ON public.chat_messages(question_id);
 
 -- 6) DOCUMENTS
+-- Databases created while the content was still stored in documents.data are migrated with
+-- backend/src/migrate_document_blobs.py, this file only runs on a fresh database.
 CREATE TABLE IF NOT EXISTS public.documents (
   document_id    bigserial PRIMARY KEY,
   name           text NOT NULL,
   description    text NOT NULL DEFAULT '',
   content_type   text NOT NULL,
-  data           bytea NOT NULL,
-  text_data      text NOT NULL,
+  blob_key       text NOT NULL,
+  size           bigint NOT NULL DEFAULT 0,
+  text_data      text NOT NULL DEFAULT '',
+  content_hash   text,
+  status         text NOT NULL DEFAULT 'ready'
+                 CHECK (status IN ('ingesting','ready','failed')),
   rec_date       timestamptz NOT NULL DEFAULT now()
 );
 
+CREATE INDEX IF NOT EXISTS documents_content_hash_idx
+  ON public.documents(content_hash);
+
+CREATE INDEX IF NOT EXISTS documents_rec_date_id_idx
+  ON public.documents(rec_date DESC, document_id DESC);
+
+-- 7) LLM WORKFLOW RESULT CACHE (shared by all backend replicas)
+CREATE TABLE IF NOT EXISTS public.llm_cache (
+  cache_key      text PRIMARY KEY,
+  template_name  text NOT NULL,
+  result         jsonb NOT NULL,
+  created_at     timestamptz NOT NULL DEFAULT now(),
+  expires_at     timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS llm_cache_expires_idx
+  ON public.llm_cache(expires_at);
+
+-- 8) LLM WORKFLOW JOBS (polled by the backend workers with FOR UPDATE SKIP LOCKED)
+CREATE TABLE IF NOT EXISTS public.llm_jobs (
+  job_id           uuid PRIMARY KEY,
+  template_name    text NOT NULL,
+  arguments        jsonb NOT NULL,
+  candidates       integer NOT NULL DEFAULT 1,
+  use_cache        boolean NOT NULL DEFAULT true,
+  max_retries      integer,
+  deadline_seconds double precision,
+  status           text NOT NULL DEFAULT 'queued'
+                   CHECK (status IN ('queued','running','completed','failed','cancelled')),
+  attempts         integer NOT NULL DEFAULT 0,
+  max_attempts     integer NOT NULL DEFAULT 3,
+  result           jsonb,
+  error            text,
+  cancel_requested boolean NOT NULL DEFAULT false,
+  locked_by        text,
+  locked_until     timestamptz,
+  run_after        timestamptz NOT NULL DEFAULT now(),
+  created_at       timestamptz NOT NULL DEFAULT now(),
+  updated_at       timestamptz NOT NULL DEFAULT now(),
+  finished_at      timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS llm_jobs_queued_run_after_idx
+  ON public.llm_jobs(run_after) WHERE status = 'queued';
+
+CREATE INDEX IF NOT EXISTS llm_jobs_running_locked_until_idx
+  ON public.llm_jobs(locked_until) WHERE status = 'running';
+
+-- 9) MASTERY SUMMARIES PER LEARNER AND DOCUMENT (refreshed with user_progress, backfilled by rebuild_mastery.py)
+CREATE TABLE IF NOT EXISTS public.learner_document_mastery (
+  learner_key        uuid NOT NULL,
+  document_id        int4 NOT NULL,
+  answered_count     integer NOT NULL DEFAULT 0,
+  new_count          integer NOT NULL DEFAULT 0,
+  learning_count     integer NOT NULL DEFAULT 0,
+  known_count        integer NOT NULL DEFAULT 0,
+  needs_review_count integer NOT NULL DEFAULT 0,
+  best_score_sum     integer NOT NULL DEFAULT 0,
+  updated_at         timestamptz NOT NULL DEFAULT now(),
+
+  PRIMARY KEY (learner_key, document_id)
+);
+
+CREATE INDEX IF NOT EXISTS learner_document_mastery_document_idx
+  ON public.learner_document_mastery(document_id);
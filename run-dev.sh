@@ -2,6 +2,7 @@
 mkdir -p _letsencrypt
 mkdir -p _postgres
 mkdir -p _backend_logs
+mkdir -p _blobs
 
 docker run -ti -v "./frontend/vite-project:/app" -w /app node:22-alpine3.20 npm i
 
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+docker compose -f ./compose.yaml build && docker compose -f ./compose-dev.yaml --profile mock-llm up mock-llm
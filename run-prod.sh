@@ -2,4 +2,5 @@
 mkdir -p _letsencrypt
 mkdir -p _postgres
 mkdir -p _backend_logs
+mkdir -p _blobs
 docker compose -f ./compose.yaml build && docker compose -f ./compose.yaml --env-file .env.prod up -d